@@ -13,6 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src
 
 from finance_core.background_upload import (
     start_upload_queue, 
+    stop_upload_queue,
     retry_failed_transactions, 
     clear_failed_transactions_after_retry,
     get_upload_queue
@@ -98,7 +99,7 @@ def main():
         wait_time = 0
         
         while wait_time < max_wait_time:
-            queue_size = queue.upload_queue.qsize()
+            queue_size = queue.pending_uploads()
             if queue_size == 0:
                 logger.info("✅ All transactions have been processed!")
                 break
@@ -118,6 +119,9 @@ def main():
     except Exception as e:
         logger.error(f"❌ Error during retry process: {e}")
         sys.exit(1)
+    finally:
+        # Spool anything still queued (e.g. after a timeout) so the bot uploads it later
+        stop_upload_queue()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
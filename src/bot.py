@@ -5,6 +5,7 @@ from discord.ext import commands, tasks
 import os
 import asyncio
 import logging
+import signal
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from config_settings import DISCORD_TOKEN, DAILY_REMINDER_TIME, REMINDER_CHANNEL_ID, MENTION_USER_IDS, CSV_DOWNLOAD_LINK, TIMEZONE
@@ -66,8 +67,38 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
+class FinanceDiscordBot(commands.Bot):
+    """Bot that stops the Google Sheets upload queue and writes pending session changes before it disconnects"""
+    
+    async def setup_hook(self):
+        # docker stop and systemd send SIGTERM, which would otherwise end the process without close()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self._on_sigterm)
+        except NotImplementedError:
+            pass  # No loop signal handlers on Windows
+    
+    def _on_sigterm(self):
+        logger.info("🛑 SIGTERM received, shutting down...")
+        self._shutdown_task = asyncio.create_task(self.close())
+    
+    async def close(self):
+        try:
+            from finance_core.background_upload import stop_upload_queue
+            # stop() waits for the worker thread and spools pending uploads, so keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, stop_upload_queue)
+        except Exception as e:
+            logger.error(f"❌ Failed to stop upload queue: {e}")
+        
+        # Session writes are debounced; don't lose the last ones (the upload worker may have added some)
+        try:
+            from finance_core.session_management import flush_all_sessions
+            flush_all_sessions()
+        except Exception as e:
+            logger.error(f"❌ Failed to flush sessions: {e}")
+        await super().close()
+
 # Create bot instance with slash command support
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = FinanceDiscordBot(command_prefix="!", intents=intents)
 
 logger.info("✅ Bot instance created")
 
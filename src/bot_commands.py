@@ -7,11 +7,13 @@ from discord.ext import commands
 import os
 import logging
 import asyncio
+from typing import Set
 from finance_core.csv_helper import load_transactions_from_csv
 from finance_core.session_management import (
-    session_exists, load_session, clear_session, save_session
+    session_exists, load_session, clear_session, save_session, get_cached_transactions
 )
 from finance_core.ui.cached_transactions_view import CachedTransactionsView
+from finance_core.ui.helpers import spawn
 from finance_core.export import process_csv_file
 from config_settings import UPLOAD_DIR
 
@@ -20,6 +22,12 @@ logger = logging.getLogger(__name__)
 class FinanceBot(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Pending auto-delete tasks, kept referenced until done and cancelled on unload
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def cog_unload(self):
+        for task in list(self._tasks):
+            task.cancel()
 
     @app_commands.command(name="resume", description="Resume a previously paused finance session")
     async def resume(self, interaction: discord.Interaction):
@@ -28,7 +36,7 @@ class FinanceBot(commands.Cog):
             await interaction.response.send_message("❌ No session to resume.", ephemeral=True)
             # Auto-delete after 3 seconds
             response = await interaction.original_response()
-            asyncio.create_task(self._delete_after_delay(response, 3))
+            spawn(self._tasks, self._delete_after_delay(response, 3))
             return
 
         await interaction.response.send_message("🔄 Resuming session...", ephemeral=True)
@@ -41,7 +49,7 @@ class FinanceBot(commands.Cog):
             await interaction.response.send_message("❌ No active session.", ephemeral=True)
             # Auto-delete after 3 seconds
             response = await interaction.original_response()
-            asyncio.create_task(self._delete_after_delay(response, 3))
+            spawn(self._tasks, self._delete_after_delay(response, 3))
             return
 
         remaining, income, expenses = load_session(user_id)
@@ -62,7 +70,7 @@ class FinanceBot(commands.Cog):
         await interaction.response.send_message(status_msg, ephemeral=True)
         # Auto-delete after 8 seconds
         response = await interaction.original_response()
-        asyncio.create_task(self._delete_after_delay(response, 8))
+        spawn(self._tasks, self._delete_after_delay(response, 8))
 
     @app_commands.command(name="cancel", description="Cancel and delete your current session")
     async def cancel(self, interaction: discord.Interaction):
@@ -71,14 +79,14 @@ class FinanceBot(commands.Cog):
             await interaction.response.send_message("❌ No session to cancel.", ephemeral=True)
             # Auto-delete after 3 seconds
             response = await interaction.original_response()
-            asyncio.create_task(self._delete_after_delay(response, 3))
+            spawn(self._tasks, self._delete_after_delay(response, 3))
             return
 
         clear_session(user_id)
         await interaction.response.send_message("✅ Session canceled and data cleared.", ephemeral=True)
         # Auto-delete after 5 seconds
         response = await interaction.original_response()
-        asyncio.create_task(self._delete_after_delay(response, 5))
+        spawn(self._tasks, self._delete_after_delay(response, 5))
 
     @app_commands.command(name="upload", description="Upload a CSV file to start processing transactions")
     async def upload(self, interaction: discord.Interaction, attachment: discord.Attachment):
@@ -88,14 +96,14 @@ class FinanceBot(commands.Cog):
             await interaction.response.send_message("⚠️ Active session exists. Use `/cancel` first.", ephemeral=True)
             # Auto-delete after 5 seconds
             response = await interaction.original_response()
-            asyncio.create_task(self._delete_after_delay(response, 5))
+            spawn(self._tasks, self._delete_after_delay(response, 5))
             return
 
         if not attachment.filename.endswith(".csv"):
             await interaction.response.send_message("❌ Please upload a CSV file.", ephemeral=True)
             # Auto-delete after 4 seconds
             response = await interaction.original_response()
-            asyncio.create_task(self._delete_after_delay(response, 4))
+            spawn(self._tasks, self._delete_after_delay(response, 4))
             return
 
         # Create user-specific filename to avoid conflicts
@@ -110,7 +118,7 @@ class FinanceBot(commands.Cog):
             await interaction.response.send_message(f"❌ Error: {str(e)}", ephemeral=True)
             # Auto-delete error after 8 seconds
             response = await interaction.original_response()
-            asyncio.create_task(self._delete_after_delay(response, 8))
+            spawn(self._tasks, self._delete_after_delay(response, 8))
             # Clean up file if it exists
             if os.path.exists(file_path):
                 os.remove(file_path)
@@ -120,7 +128,6 @@ class FinanceBot(commands.Cog):
         user_id = interaction.user.id
         
         try:
-            from finance_core.session_management import get_cached_transactions
             cached_transactions = get_cached_transactions(user_id)
         except Exception as e:
             await interaction.response.send_message(f"❌ Error loading cached transactions: {str(e)}", ephemeral=True)
@@ -130,7 +137,7 @@ class FinanceBot(commands.Cog):
             await interaction.response.send_message("📦 No cached transactions found.", ephemeral=True)
             # Auto-delete after 3 seconds
             response = await interaction.original_response()
-            asyncio.create_task(self._delete_after_delay(response, 3))
+            spawn(self._tasks, self._delete_after_delay(response, 3))
             return
         
         # Create summary of cached transactions
@@ -64,6 +64,7 @@ UPLOAD_DIR = "data/uploads"
 
 # Session Configuration  
 SESSION_DIR = "data/sessions"
+SESSION_PRETTY_JSON = False  # Indent session files for manual inspection (slower, larger)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # DIRECTORY CREATION
@@ -106,5 +107,6 @@ __all__ = [
     "GSHEET_EXPENSE_START_ROW",
     "GSHEET_INCOME_START_ROW",
     "UPLOAD_DIR",
-    "SESSION_DIR"
+    "SESSION_DIR",
+    "SESSION_PRETTY_JSON"
 ]
@@ -3,27 +3,46 @@ Background Google Sheets upload queue with throttling.
 Handles immediate transaction uploads with proper rate limiting.
 """
 
+import asyncio
+import contextlib
+import functools
 import logging
-from typing import Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 import threading
 import time
-from queue import Queue, Empty
+from queue import Queue, Empty, Full
 import json
 import os
 
-from finance_core.google_sheets import GoogleSheetsExporter
+# The bot and retry_failed_transactions.py share the spool file; an advisory lock keeps
+# one process from draining (and re-uploading) lines another is reading. Not on Windows.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from finance_core.google_sheets import GoogleSheetsExporter, SHEET_COLUMNS, _last_row_of_range
+from finance_core.session_management import (
+    get_cached_transaction,
+    update_cached_transaction_row, remove_cached_transaction, load_session, save_session
+)
 
 logger = logging.getLogger(__name__)
 
+# Uploads held in memory before new ones overflow to the spool file
+UPLOAD_QUEUE_MAXSIZE = 256
+# Most cached-dummy replacements written together in one values.batchUpdate request
+REPLACEMENT_BATCH_SIZE = 50
+
 @dataclass
 class TransactionUpload:
     """Represents a transaction to be uploaded to Google Sheets"""
     transaction: Dict[str, Any]
     transaction_type: str  # "income" or "expense"
     user_id: int
-    timestamp: datetime
+    timestamp: float  # time.monotonic() at enqueue
 
 @dataclass
 class CachedTransactionReplacement:
@@ -32,7 +51,11 @@ class CachedTransactionReplacement:
     new_transaction: Dict[str, Any]
     transaction_type: str
     user_id: int
-    timestamp: datetime
+    timestamp: float  # time.monotonic() at enqueue
+
+def _is_reserved_replacement(upload: TransactionUpload) -> bool:
+    """Whether an upload overwrites a cached dummy in a row that is already known"""
+    return bool(upload.transaction.get('_is_replacement') and upload.transaction.get('_reserved_row'))
 
 class GoogleSheetsUploadQueue:
     """
@@ -47,12 +70,15 @@ class GoogleSheetsUploadQueue:
     
     def __init__(self, credentials_path: str):
         self.credentials_path = credentials_path
-        self.upload_queue = Queue()
+        self.upload_queue = Queue(maxsize=UPLOAD_QUEUE_MAXSIZE)
         self.is_running = False
         self.thread: Optional[threading.Thread] = None
         self.exporter: Optional[GoogleSheetsExporter] = None
+        self.worksheet = None  # Cached worksheet handle, reused for every request
+        # Rows of dummies uploaded by this worker, for replacements queued before the row was known
+        self.dummy_rows: Dict[str, int] = {}
         
-        # Load configurable starting rows
+        # Configurable first data row of each column block; appends never go above it
         try:
             from config_settings import GSHEET_EXPENSE_START_ROW, GSHEET_INCOME_START_ROW
             self.default_expense_start_row = GSHEET_EXPENSE_START_ROW
@@ -62,145 +88,133 @@ class GoogleSheetsUploadQueue:
             self.default_expense_start_row = 2
             self.default_income_start_row = 2
         
-        # Track row positions - will be loaded per user when needed
-        self.current_expense_row = self.default_expense_start_row  # Use configurable default
-        self.current_income_row = self.default_income_start_row
-        self.current_user_id = None  # Track which user's positions we have loaded
-        
         # Rate limiting
         self.last_request_time = 0
         self.min_request_interval = 2.0  # 2 seconds between requests
-    
-    def _load_row_positions(self, user_id: int):
-        """Load the current row positions for a specific user"""
-        from finance_core.session_management import get_sheet_positions
-        
-        try:
-            positions = get_sheet_positions(user_id)
-            self.current_expense_row = positions.get('expense_row', self.default_expense_start_row)
-            self.current_income_row = positions.get('income_row', self.default_income_start_row)
-            
-            # Handle None values that might be stored in the session
-            if self.current_expense_row is None:
-                self.current_expense_row = self.default_expense_start_row
-            if self.current_income_row is None:
-                self.current_income_row = self.default_income_start_row
-                
-            self.current_user_id = user_id
-            logger.info(f"📍 Loaded row positions for user {user_id}: expenses={self.current_expense_row}, income={self.current_income_row}")
-            
-            # If no positions saved yet, detect them
-            if positions.get('last_updated') is None:
-                self._detect_current_positions(user_id)
-            else:
-                # If cached positions are very high (>10), verify the sheet actually has that much data
-                # This prevents using stale positions when the sheet was cleared
-                # Only do this check if we have valid numeric values
-                if (self.current_expense_row and self.current_expense_row > 10) or (self.current_income_row and self.current_income_row > 10):
-                    logger.info(f"🔍 Cached positions seem high (exp:{self.current_expense_row}, inc:{self.current_income_row}), verifying with sheet...")
-                    
-                    # Quick check to see if sheet actually has data at those positions
-                    if not self.exporter:
-                        self.exporter = GoogleSheetsExporter(self.credentials_path)
-                    sheet = self.exporter._get_worksheet()
-                    
-                    # Check if there's actually data near the cached positions
-                    try:
-                        check_range = f"B{max(1, self.current_expense_row-5)}:J{self.current_expense_row}"
-                        check_data = sheet.get(check_range)
-                        
-                        # Count non-empty rows
-                        data_rows = 0
-                        if check_data:
-                            for row in check_data:
-                                if any(str(cell).strip() for cell in row if cell):
-                                    data_rows += 1
-                        
-                        if data_rows < 3:  # If less than 3 rows of data found, sheet is likely empty
-                            logger.warning(f"⚠️ Cached positions point to mostly empty area ({data_rows} data rows found)")
-                            logger.warning(f"⚠️ Sheet may have been cleared - forcing fresh detection")
-                            self._detect_current_positions(user_id)
-                        else:
-                            logger.info(f"✅ Sheet has {data_rows} data rows, cached positions seem valid")
-                    except Exception as e:
-                        logger.warning(f"⚠️ Could not verify cached positions: {e}, forcing fresh detection")
-                        self._detect_current_positions(user_id)
-                        
-        except Exception as e:
-            logger.error(f"❌ Error loading row positions: {e}")
-            self._detect_current_positions(user_id)
-    
-    def _save_row_positions(self, user_id: int):
-        """Save current row positions for a specific user"""
-        from finance_core.session_management import save_sheet_positions
         
-        try:
-            save_sheet_positions(user_id, self.current_expense_row, self.current_income_row)
-            logger.debug(f"💾 Saved row positions for user {user_id}: expenses={self.current_expense_row}, income={self.current_income_row}")
-        except Exception as e:
-            logger.error(f"❌ Error saving row positions: {e}")
+        # Overflow spool: uploads that don't fit in the bounded queue are appended here
+        # as JSON lines and fed back in when the worker runs idle
+        from finance_core.session_management import SESSION_DIR
+        self.spool_path = os.path.join(os.path.dirname(SESSION_DIR), "upload_spool.jsonl")
+        self.spool_lock = threading.Lock()
+        self.spool_lock_path = self.spool_path + ".lock"
+        # Upload the worker took off the queue but hadn't handled when it stopped; it is
+        # older than anything left in the queue, so stop() spools it first
+        self.held_upload: Optional[TransactionUpload] = None
+        # Guards held_upload and stop_flushed between the worker and stop()
+        self.held_lock = threading.Lock()
+        self.stop_flushed = False  # Set once stop() has spooled what was in memory
+        with self._spool_locked():
+            self.spooled_count = len(self._read_spool())
     
-    def _detect_current_positions(self, user_id: int):
-        """Detect current last row positions in the Google Sheet for a specific user"""
-        try:
+    def _get_worksheet(self):
+        """Return the shared worksheet, creating the exporter and opening the sheet on first use"""
+        if self.worksheet is None:
             if not self.exporter:
                 self.exporter = GoogleSheetsExporter(self.credentials_path)
-            
-            sheet = self.exporter._get_worksheet()
-            
-            logger.info(f"🔍 Detecting row positions in Google Sheet for user {user_id}...")
-            
-            # Get expense columns (B:E)
-            expense_values = sheet.get('B1:E200')
-            self.current_expense_row = self._find_last_data_row(expense_values, "expense")
-            
-            # Get income columns (G:J)  
-            income_values = sheet.get('G1:J200')
-            self.current_income_row = self._find_last_data_row(income_values, "income")
-            
-            # Ensure we start at least at the configured starting rows
-            self.current_expense_row = max(self.current_expense_row, self.default_expense_start_row)
-            self.current_income_row = max(self.current_income_row, self.default_income_start_row)
-            
-            logger.info(f"🔍 Detected row positions for user {user_id}: expenses={self.current_expense_row}, income={self.current_income_row}")
-            self._save_row_positions(user_id)
-            
-        except Exception as e:
-            logger.error(f"❌ Error detecting row positions: {e}")
-            # Fallback to safe defaults
-            self.current_expense_row = self.default_expense_start_row
-            self.current_income_row = self.default_income_start_row
+            self.worksheet = self.exporter._get_worksheet()
+        return self.worksheet
     
-    def _find_last_data_row(self, values, column_type="expense"):
-        """Find the last row that contains actual data
-        
-        Args:
-            values: Sheet values to analyze
-            column_type: "expense" or "income" to determine minimum starting row
-        """
-        if not values:
-            min_start_row = self.default_expense_start_row if column_type == "expense" else self.default_income_start_row
-            return min_start_row
-        
-        # Determine minimum starting row based on configuration
-        min_start_row = self.default_expense_start_row if column_type == "expense" else self.default_income_start_row
-        
-        last_data_row = 0
-        for i, row in enumerate(values):
-            # Check if any cell in this row has non-empty, non-whitespace content
-            has_data = False
-            for cell in row:
-                cell_str = str(cell).strip() if cell else ""
-                if cell_str:
-                    has_data = True
+    @contextlib.contextmanager
+    def _spool_locked(self):
+        """Hold the spool lock, across threads and across processes sharing the spool file"""
+        with self.spool_lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.spool_lock_path), exist_ok=True)
+            with open(self.spool_lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _read_spool(self) -> List[str]:
+        """Read the pending spool lines (oldest first)"""
+        if not os.path.exists(self.spool_path):
+            return []
+        with open(self.spool_path, "r", encoding="utf-8") as f:
+            return [line for line in f if line.strip()]
+    
+    def _write_spool(self, lines: List[str]):
+        """Replace the spool contents, removing the file once it's empty"""
+        if not lines:
+            if os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+            return
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.spool_path)
+    
+    def _spool_line(self, upload: TransactionUpload) -> str:
+        """Serialize an upload to a single spool line"""
+        return json.dumps({
+            "transaction": upload.transaction,
+            "transaction_type": upload.transaction_type,
+            "user_id": upload.user_id
+        }) + "\n"
+    
+    def _spool_upload(self, upload: TransactionUpload):
+        """Append an upload to the overflow spool file"""
+        with self._spool_locked():
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                f.write(self._spool_line(upload))
+            self.spooled_count += 1
+    
+    def _drain_spool(self):
+        """Move spooled uploads back into the queue, as many as currently fit"""
+        if not self.spooled_count:
+            return
+        with self._spool_locked():
+            # Another process may have drained part of it meanwhile, so go by the file
+            lines = self._read_spool()
+            moved = 0
+            for line in lines:
+                data = json.loads(line)
+                upload = TransactionUpload(
+                    transaction=data["transaction"],
+                    transaction_type=data["transaction_type"],
+                    user_id=data["user_id"],
+                    timestamp=time.monotonic()
+                )
+                try:
+                    self.upload_queue.put_nowait(upload)
+                except Full:
                     break
-            
-            if has_data:
-                last_data_row = i + 1  # Convert to 1-based row number
-        
-        # Return the next available row (last data row + 1), but ensure it's at least the configured starting row
-        next_row = max(last_data_row + 1, min_start_row)
-        return next_row
+                moved += 1
+            self._write_spool(lines[moved:])
+            self.spooled_count = len(lines) - moved
+        if moved:
+            logger.info(f"📤 Moved {moved} spooled uploads back into the queue ({self.spooled_count} still spooled)")
+    
+    def _flush_queue_to_spool(self):
+        """Persist everything still in memory to the front of the spool (used on shutdown)"""
+        pending = []
+        with self.held_lock:
+            self.stop_flushed = True
+            if self.held_upload is not None:
+                pending.append(self.held_upload)
+                self.held_upload = None
+        while True:
+            try:
+                pending.append(self.upload_queue.get_nowait())
+                self.upload_queue.task_done()
+            except Empty:
+                break
+        if not pending:
+            return
+        with self._spool_locked():
+            # Queued uploads are older than anything already spooled
+            lines = [self._spool_line(upload) for upload in pending] + self._read_spool()
+            self._write_spool(lines)
+            self.spooled_count = len(lines)
+        logger.info(f"💾 Spooled {len(pending)} pending uploads to {self.spool_path}")
+    
+    def pending_uploads(self) -> int:
+        """Number of uploads waiting, in memory and in the spool"""
+        return self.upload_queue.qsize() + self.spooled_count
     
     def start(self):
         """Start the background upload thread"""
@@ -208,7 +222,15 @@ class GoogleSheetsUploadQueue:
             logger.warning("⚠️ Upload queue already running")
             return
             
+        # Authorize and open the worksheet up front so the first upload doesn't pay for it.
+        # The authorized client keeps its HTTP session alive for all later requests.
+        try:
+            self._get_worksheet()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not open Google Sheet yet, will retry on first upload: {e}")
+            
         self.is_running = True
+        self.stop_flushed = False
         self.thread = threading.Thread(target=self._upload_worker, daemon=True)
         self.thread.start()
         logger.info("🚀 Google Sheets upload queue started")
@@ -218,6 +240,9 @@ class GoogleSheetsUploadQueue:
         self.is_running = False
         if self.thread:
             self.thread.join(timeout=5)
+            if self.thread.is_alive():
+                logger.warning("⚠️ Upload worker still busy after 5s, spooling the pending uploads without waiting for it")
+        self._flush_queue_to_spool()
         logger.info("🛑 Google Sheets upload queue stopped")
     
     def queue_transaction(self, transaction: Dict[str, Any], transaction_type: str, user_id: int):
@@ -226,39 +251,28 @@ class GoogleSheetsUploadQueue:
             transaction=transaction,
             transaction_type=transaction_type,
             user_id=user_id,
-            timestamp=datetime.now()
+            timestamp=time.monotonic()
         )
         
-        # For cached transactions (dummy uploads), immediately reserve the row position
-        # to prevent multiple cached transactions from using the same row
-        # Skip this for replacements since they use existing rows
-        if 'cache_id' in transaction and not transaction.get('_is_replacement'):
-            # Ensure we have positions loaded for this user
-            if self.current_user_id != user_id:
-                self._load_row_positions(user_id)
-            
-            # Reserve the row position immediately
-            if transaction_type == "expense":
-                reserved_row = self.current_expense_row
-                self.current_expense_row += 1
-            else:  # income
-                reserved_row = self.current_income_row
-                self.current_income_row += 1
-            
-            # Save the updated positions to prevent conflicts
-            self._save_row_positions(user_id)
-            
-            # Store the reserved row in the cached transaction
-            from finance_core.session_management import update_cached_transaction_row
-            update_cached_transaction_row(user_id, transaction['cache_id'], reserved_row)
-            
-            logger.info(f"📍 Reserved row {reserved_row} for cached transaction {transaction['cache_id']} ({transaction_type})")
+        # Cached dummies don't reserve a row here: like regular uploads they are appended by
+        # the worker and get the row Sheets picks, so a row can't be promised to a dummy
+        # while an earlier upload is still on its way to the same spot.
         
-        self.upload_queue.put(upload)
+        # Keep FIFO order: once anything is spooled, new uploads queue up behind it
+        if self.spooled_count:
+            self._spool_upload(upload)
+        else:
+            try:
+                self.upload_queue.put_nowait(upload)
+            except Full:
+                logger.warning(f"⚠️ Upload queue full ({UPLOAD_QUEUE_MAXSIZE}), spooling to {self.spool_path}")
+                self._spool_upload(upload)
         
-        upload_type = "replacement" if transaction.get('_is_replacement') else "upload"
-        cache_info = f" (cache_id: {transaction.get('cache_id', 'N/A')})"
-        logger.debug(f"📝 Queued {transaction_type} transaction for {upload_type} (queue size: {self.upload_queue.qsize()}){cache_info}")
+        # qsize() takes the queue lock, so only ask for it when the message is actually emitted
+        if logger.isEnabledFor(logging.DEBUG):
+            upload_type = "replacement" if transaction.get('_is_replacement') else "upload"
+            cache_info = f" (cache_id: {transaction.get('cache_id', 'N/A')})"
+            logger.debug(f"📝 Queued {transaction_type} transaction for {upload_type} (queue size: {self.upload_queue.qsize()}){cache_info}")
     
     def queue_cached_replacement(self, cache_id: str, new_transaction: Dict[str, Any], transaction_type: str, user_id: int):
         """Queue a cached transaction replacement"""
@@ -267,13 +281,15 @@ class GoogleSheetsUploadQueue:
             new_transaction=new_transaction,
             transaction_type=transaction_type,
             user_id=user_id,
-            timestamp=datetime.now()
+            timestamp=time.monotonic()
         )
         
-        # Add the cache_id and replacement flag to the transaction
-        # Preserve any existing fields like _reserved_row
-        new_transaction_with_cache = {**new_transaction, "cache_id": cache_id, "_is_replacement": True}
-        self.queue_transaction(new_transaction_with_cache, transaction_type, user_id)
+        # Add the cache_id and replacement flag to the transaction in place: callers hand over
+        # a dict built for this upload, so a second copy isn't needed. Existing fields like
+        # _reserved_row are kept.
+        new_transaction["cache_id"] = cache_id
+        new_transaction["_is_replacement"] = True
+        self.queue_transaction(new_transaction, transaction_type, user_id)
         logger.info(f"🔄 Queued replacement for cached transaction {cache_id} (reserved_row: {new_transaction.get('_reserved_row', 'N/A')})")
 
     def _rate_limit(self):
@@ -291,15 +307,37 @@ class GoogleSheetsUploadQueue:
     def _upload_worker(self):
         """Background worker that processes the upload queue"""
         logger.info("👷 Upload worker started")
+        # An upload taken off the queue while collecting a replacement batch, handled next
+        held = None
         
         while self.is_running:
             try:
-                # Get next item from queue (wait up to 1 second)
-                upload = self.upload_queue.get(timeout=1.0)
+                if held is not None:
+                    upload, held = held, None
+                else:
+                    # Get next item from queue (wait up to 1 second)
+                    upload = self.upload_queue.get(timeout=1.0)
                 
                 # Apply rate limiting
                 self._rate_limit()
                 
+                if _is_reserved_replacement(upload):
+                    # Replacements confirmed while we waited out the rate limit share one request
+                    batch = [upload]
+                    while len(batch) < REPLACEMENT_BATCH_SIZE:
+                        try:
+                            upload = self.upload_queue.get_nowait()
+                        except Empty:
+                            break
+                        if not _is_reserved_replacement(upload):
+                            held = upload
+                            break
+                        batch.append(upload)
+                    self._upload_replacements(batch)
+                    for _ in batch:
+                        self.upload_queue.task_done()
+                    continue
+                
                 # Upload the transaction
                 self._upload_single_transaction(upload)
                 
@@ -307,58 +345,114 @@ class GoogleSheetsUploadQueue:
                 self.upload_queue.task_done()
                 
             except Empty:
-                # No items in queue, continue
+                # No items in queue, pull in any spooled overflow
+                try:
+                    self._drain_spool()
+                except Exception as e:
+                    logger.error(f"❌ Failed to drain upload spool: {e}")
                 continue
             except Exception as e:
                 logger.error(f"❌ Error in upload worker: {e}")
                 # Continue running even if individual uploads fail
                 continue
         
+        # Handed to stop(), which spools it ahead of the queue's remaining items. If stop()
+        # stopped waiting and already spooled the queue, spool it behind that rather than lose it.
+        with self.held_lock:
+            late = held if self.stop_flushed else None
+            if late is None:
+                self.held_upload = held
+        if late is not None:
+            self._spool_upload(late)
         logger.info("👷 Upload worker stopped")
     
+    def _upload_replacements(self, uploads: List[TransactionUpload]):
+        """
+        Overwrite several cached dummies (rows already reserved) with one values.batchUpdate
+        request. If the batch fails, the replacements are retried one by one.
+        """
+        if len(uploads) == 1:
+            self._upload_single_transaction(uploads[0])
+            return
+        
+        try:
+            sheet = self._get_worksheet()
+            
+            last_row = max(upload.transaction['_reserved_row'] for upload in uploads)
+            if not self.exporter.check_row_bounds(last_row):
+                logger.warning(f"⚠️ Target row {last_row} exceeds sheet bounds, expanding sheet...")
+                self.exporter.ensure_sheet_capacity(last_row, buffer_rows=50)
+            
+            data = []
+            for upload in uploads:
+                start_col, end_col = SHEET_COLUMNS[upload.transaction_type]
+                row = upload.transaction['_reserved_row']
+                data.append({
+                    "range": f"{start_col}{row}:{end_col}{row}",
+                    "values": [self.exporter.format_transaction_for_sheet(upload.transaction)]
+                })
+            sheet.batch_update(data)
+        except Exception as e:
+            logger.error(f"❌ Failed to batch-replace {len(uploads)} cached transactions, retrying one by one: {e}")
+            for upload in uploads:
+                self._rate_limit()
+                try:
+                    self._upload_single_transaction(upload)
+                except Exception:
+                    pass  # Already logged by _upload_single_transaction
+            return
+        
+        for upload in uploads:
+            # The UI usually removed it already, which is fine
+            remove_cached_transaction(upload.user_id, upload.transaction['cache_id'])
+            self.dummy_rows.pop(upload.transaction['cache_id'], None)
+        logger.info(f"🔄 Replaced {len(uploads)} cached dummies in one request: {', '.join(d['range'] for d in data)}")
+    
     def _upload_single_transaction(self, upload: TransactionUpload):
         """Upload a single transaction to Google Sheets"""
         try:
-            # Ensure we have positions loaded for this user
-            if self.current_user_id != upload.user_id:
-                self._load_row_positions(upload.user_id)
-            
-            if not self.exporter:
-                self.exporter = GoogleSheetsExporter(self.credentials_path)
-            
-            # Try to get the worksheet
-            sheet = self.exporter._get_worksheet()
+            sheet = self._get_worksheet()
             
             # Format transaction for sheet
             formatted_data = self.exporter.format_transaction_for_sheet(upload.transaction)
             
-            # For cached transactions, check if row was already reserved during queuing
+            # Replacements go to the row of the dummy they replace; everything else is appended
             target_row = None
-            use_reserved_row = False
             
-            if 'cache_id' in upload.transaction:
-                # Check if this is a replacement with a pre-stored reserved row
-                if upload.transaction.get('_is_replacement') and upload.transaction.get('_reserved_row'):
+            if upload.transaction.get('_is_replacement'):
+                cache_id = upload.transaction['cache_id']
+                # Replacements confirmed before their dummy was uploaded carry no row; the dummy
+                # was queued first, so by now its row is known
+                target_row = self.dummy_rows.pop(cache_id, None)
+                if upload.transaction.get('_reserved_row'):
                     target_row = upload.transaction['_reserved_row']
-                    use_reserved_row = True
-                    logger.info(f"🔄 Using pre-stored reserved row {target_row} for replacement of cached transaction {upload.transaction['cache_id']}")
-                else:
-                    # For non-replacements, look up the cached transaction to get the reserved row
-                    from finance_core.session_management import get_cached_transactions
-                    cached_transactions = get_cached_transactions(upload.user_id)
-                    
-                    for cached_tx in cached_transactions:
-                        if cached_tx["cache_id"] == upload.transaction['cache_id']:
-                            logger.debug(f"🔍 Found cached transaction {upload.transaction['cache_id']} for user {upload.user_id}")
-                            reserved_row = cached_tx.get("sheet_row")
-                            if reserved_row:
-                                target_row = reserved_row
-                                use_reserved_row = True
-                                logger.info(f"🎯 Using pre-reserved row {target_row} for cached transaction {upload.transaction['cache_id']}")
-                                break
+                elif target_row is None:
+                    cached_tx = get_cached_transaction(upload.user_id, cache_id)
+                    target_row = cached_tx.get("sheet_row") if cached_tx else None
+                if target_row:
+                    logger.info(f"🔄 Using row {target_row} of the dummy for replacement of cached transaction {cache_id}")
             
-            # If no reserved row, use current positions (only for non-replacements)
-            if not target_row:
+            start_col, end_col = SHEET_COLUMNS[upload.transaction_type]
+            
+            if target_row:
+                # Replacements overwrite their dummy in place
+                # CRITICAL: Check if the target row exceeds sheet bounds and expand if necessary
+                try:
+                    if not self.exporter.check_row_bounds(target_row):
+                        logger.warning(f"⚠️ Target row {target_row} exceeds sheet bounds, expanding sheet...")
+                        self.exporter.ensure_sheet_capacity(target_row, buffer_rows=50)
+                        logger.info(f"✅ Sheet expanded to accommodate row {target_row}")
+                except Exception as e:
+                    logger.error(f"❌ Failed to expand sheet for row {target_row}: {e}")
+                    raise Exception(f"Cannot upload to row {target_row}: sheet expansion failed: {e}")
+                
+                target_range = f"{start_col}{target_row}:{end_col}{target_row}"
+                try:
+                    sheet.update([formatted_data], target_range)
+                except Exception as e:
+                    logger.error(f"❌ Failed to upload to range {target_range}: {e}")
+                    raise
+            else:
                 if upload.transaction.get('_is_replacement'):
                     logger.error(
                         "🚨 CRITICAL: Replacement transaction has no reserved row!",
@@ -368,74 +462,27 @@ class GoogleSheetsUploadQueue:
                         }
                     )
                     return  # Abort replacement to prevent data corruption
-                    
-                if upload.transaction_type == "expense":
-                    target_row = self.current_expense_row
-                else:  # income
-                    target_row = self.current_income_row
-                logger.info(f"📍 Using current row {target_row} for {upload.transaction_type} transaction")
-            
-            # CRITICAL: Check if the target row exceeds sheet bounds and expand if necessary
-            try:
-                if not self.exporter.check_row_bounds(target_row):
-                    logger.warning(f"⚠️ Target row {target_row} exceeds sheet bounds, expanding sheet...")
-                    self.exporter.ensure_sheet_capacity(target_row, buffer_rows=50)
-                    logger.info(f"✅ Sheet expanded to accommodate row {target_row}")
-            except Exception as e:
-                logger.error(f"❌ Failed to expand sheet for row {target_row}: {e}")
-                raise Exception(f"Cannot upload to row {target_row}: sheet expansion failed: {e}")
-            
-            # Determine target range based on transaction type
-            if upload.transaction_type == "expense":
-                target_range = f"B{target_row}:E{target_row}"
-                check_range = f"B{target_row}:E{target_row}"
-            else:  # income
-                target_range = f"G{target_row}:J{target_row}"
-                check_range = f"G{target_row}:J{target_row}"
-            
-            # SAFETY CHECK: Verify target row is empty before uploading
-            # Skip safety check for replacements and pre-reserved rows (they should be safe by design)
-            if not use_reserved_row and not upload.transaction.get('_is_replacement'):
+                
+                # Let Sheets pick the row, for cached dummies too: values.append writes below the
+                # last row of this column block's table and grows the sheet when needed, so no
+                # emptiness or bounds checks are required. OVERWRITE (rather than INSERT_ROWS)
+                # keeps the other column block from being shifted by inserted rows. The table is
+                # anchored at the configured start row, so blank rows between the header and
+                # the data area are never picked.
+                start_row = self.default_expense_start_row if upload.transaction_type == "expense" else self.default_income_start_row
                 try:
-                    existing_data = sheet.get(check_range)
-                    if existing_data and existing_data[0]:
-                        # Check if any cell has content
-                        has_content = any(str(cell).strip() for cell in existing_data[0] if cell)
-                        if has_content:
-                            logger.error(f"🚨 CRITICAL: Target row {target_row} already contains data: {existing_data[0]}")
-                            logger.error(f"🚨 This would overwrite existing data! Recalculating row position.")
-                            
-                            # Re-detect the actual next empty row from scratch
-                            if upload.transaction_type == "expense":
-                                expense_values = sheet.get('B1:E200')
-                                corrected_row = self._find_last_data_row(expense_values, "expense")
-                                self.current_expense_row = corrected_row
-                                target_row = corrected_row
-                                target_range = f"B{target_row}:E{target_row}"
-                            else:
-                                income_values = sheet.get('G1:J200')
-                                corrected_row = self._find_last_data_row(income_values, "income")
-                                self.current_income_row = corrected_row
-                                target_row = corrected_row
-                                target_range = f"G{target_row}:J{target_row}"
-                            
-                            # Double-check the corrected row is actually empty
-                            check_range = target_range
-                            double_check = sheet.get(check_range)
-                            if double_check and double_check[0]:
-                                double_check_content = any(str(cell).strip() for cell in double_check[0] if cell)
-                                if double_check_content:
-                                    logger.error(f"🚨 Cannot safely upload - even corrected row {target_row} has data")
-                                    return  # Abort upload to prevent overwriting
+                    response = sheet.append_rows(
+                        [formatted_data],
+                        insert_data_option="OVERWRITE",
+                        table_range=f"{start_col}{start_row}:{end_col}{start_row}",
+                    )
                 except Exception as e:
-                    logger.warning(f"⚠️ Could not verify target row emptiness: {e}")
-            
-            # Upload to sheet
-            try:
-                sheet.update([formatted_data], target_range)
-            except Exception as e:
-                logger.error(f"❌ Failed to upload to range {target_range}: {e}")
-                raise
+                    logger.error(f"❌ Failed to append {upload.transaction_type} transaction: {e}")
+                    raise
+                
+                target_range = response["updates"]["updatedRange"]
+                target_row = _last_row_of_range(target_range)
+                self.exporter.record_written_row(target_row)
             
             # Handle cached transaction logic
             if 'cache_id' in upload.transaction:
@@ -443,28 +490,18 @@ class GoogleSheetsUploadQueue:
                     # This is a replacement - try to remove the cached transaction from session
                     # (it might already be removed by the UI, which is fine)
                     try:
-                        from finance_core.session_management import remove_cached_transaction
                         remove_cached_transaction(upload.user_id, upload.transaction['cache_id'])
                         logger.info(f"🔄 Replaced cached dummy and removed {upload.transaction['cache_id']} from cache")
                     except Exception as e:
                         logger.debug(f"ℹ️ Cached transaction {upload.transaction['cache_id']} already removed from session: {e}")
-                elif not use_reserved_row:
-                    # This is a new dummy cache - store the row for future replacement
-                    from finance_core.session_management import update_cached_transaction_row
+                else:
+                    # This is a new dummy cache - store the row for future replacement. It is also
+                    # kept here in case the UI already confirmed (and uncached) the transaction,
+                    # with the replacement queued behind this upload.
                     update_cached_transaction_row(upload.user_id, upload.transaction['cache_id'], target_row)
+                    self.dummy_rows[upload.transaction['cache_id']] = target_row
                     logger.info(f"📍 Stored sheet row {target_row} for cached transaction {upload.transaction['cache_id']}")
             
-            # Update row position after successful upload (only for non-reserved rows and non-replacements)
-            if not use_reserved_row and not upload.transaction.get('_is_replacement'):
-                if upload.transaction_type == "expense":
-                    self.current_expense_row = target_row + 1
-                else:
-                    self.current_income_row = target_row + 1
-                
-                # Save updated positions
-                self._save_row_positions(upload.user_id)
-                logger.debug(f"📍 Updated current positions: expense={self.current_expense_row}, income={self.current_income_row}")
-            
             logger.info(f"✅ Uploaded {upload.transaction_type} to {target_range}: {formatted_data[2][:50]}...")
             
         except Exception as e:
@@ -482,7 +519,6 @@ class GoogleSheetsUploadQueue:
         """
         try:
             # Load session data to get categorized transactions that may have failed
-            from finance_core.session_management import load_session
             remaining, income_transactions, expense_transactions = load_session(user_id)
             
             retry_count = 0
@@ -499,7 +535,8 @@ class GoogleSheetsUploadQueue:
                     # Queue for background upload
                     self.queue_transaction(transaction, "expense", user_id)
                     retry_count += 1
-                    logger.debug(f"🔄 Queued failed expense transaction: {transaction.get('description', 'No description')[:50]}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"🔄 Queued failed expense transaction: {transaction.get('description', 'No description')[:50]}")
             
             # Retry income transactions  
             if transaction_type in (None, "income") and income_transactions:
@@ -513,7 +550,8 @@ class GoogleSheetsUploadQueue:
                     # Queue for background upload
                     self.queue_transaction(transaction, "income", user_id)
                     retry_count += 1
-                    logger.debug(f"🔄 Queued failed income transaction: {transaction.get('description', 'No description')[:50]}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"🔄 Queued failed income transaction: {transaction.get('description', 'No description')[:50]}")
             
             if retry_count > 0:
                 logger.info(f"✅ Queued {retry_count} failed transactions for retry (user {user_id})")
@@ -532,7 +570,6 @@ class GoogleSheetsUploadQueue:
         This should be called after confirming the retry uploads were successful.
         """
         try:
-            from finance_core.session_management import save_session, load_session
             
             # Load current session
             remaining, income_transactions, expense_transactions = load_session(user_id)
@@ -547,23 +584,14 @@ class GoogleSheetsUploadQueue:
             logger.error(f"❌ Error clearing failed transactions after retry: {e}")
             raise
 
-    def reset_row_positions(self, user_id: int):
-        """Force a complete reset and re-detection of row positions from the Google Sheet"""
-        logger.warning(f"🔄 Forcing complete reset of row positions for user {user_id}...")
-        
-        # Clear cached positions
-        self.current_expense_row = self.default_expense_start_row
-        self.current_income_row = self.default_income_start_row
-        self.current_user_id = None
-        
-        # Force re-detection
-        self._detect_current_positions(user_id)
-        
-        logger.info(f"✅ Row positions reset and re-detected for user {user_id}: expenses={self.current_expense_row}, income={self.current_income_row}")
-
 # Global instance
 _upload_queue: Optional[GoogleSheetsUploadQueue] = None
 
+# Enqueueing can touch the session store and the spool file, so async callers run it here
+# instead of on the event loop. A single worker keeps enqueues (and so uploads) in order,
+# which replacements rely on to find the row of a dummy queued before them.
+_enqueue_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets-enqueue")
+
 def get_upload_queue() -> GoogleSheetsUploadQueue:
     """Get the global upload queue instance"""
     global _upload_queue
@@ -599,6 +627,22 @@ def queue_cached_replacement(cache_id: str, new_transaction: Dict[str, Any], tra
     queue = get_upload_queue()
     queue.queue_cached_replacement(cache_id, new_transaction, transaction_type, user_id)
 
+async def queue_transaction_upload_async(transaction: Dict[str, Any], transaction_type: str, user_id: int):
+    """Queue a transaction for background upload without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        _enqueue_executor,
+        functools.partial(queue_transaction_upload, transaction, transaction_type, user_id)
+    )
+
+async def queue_cached_replacement_async(cache_id: str, new_transaction: Dict[str, Any], transaction_type: str, user_id: int):
+    """Queue a cached transaction replacement without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        _enqueue_executor,
+        functools.partial(queue_cached_replacement, cache_id, new_transaction, transaction_type, user_id)
+    )
+
 def retry_failed_transactions(user_id: int, transaction_type: Optional[str] = None) -> int:
     """
     Retry failed transactions from the user's session data.
@@ -1,16 +1,28 @@
 import csv
 import logging
-from typing import Dict, List, Any
+import re
+from typing import Dict, Iterator, List, Any
 from config.spaarpot_uuid_map import SPAARPOT_UUID_MAP
 
 logger = logging.getLogger(__name__)
 
+# Single alternation over every known spaarpot reference, so each remittance
+# string is scanned once instead of once per UUID. An empty map means there is
+# nothing to replace (an empty alternation would match every reference).
+_SPAARPOT_REF_RE = re.compile(
+  "Referentie: (" + "|".join(re.escape(uuid) for uuid in SPAARPOT_UUID_MAP) + ")"
+) if SPAARPOT_UUID_MAP else None
+
+# Amounts already in canonical "-123.45" form (what f"{float:.2f}" would produce),
+# which can be used verbatim. Leading zeros and "-0.00" take the float() path.
+_CANONICAL_AMOUNT_RE = re.compile(r"^(?!-0\.00$)-?(?:0|[1-9]\d*)\.\d{2}$")
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Helper: Load transactions from a fixed‐column CSV export
 # ─────────────────────────────────────────────────────────────────────────────
-def load_transactions_from_csv(csv_path: str) -> List[Dict[str, Any]]:
+def load_transactions_from_csv(csv_path: str) -> Iterator[Dict[str, Any]]:
   """
-  Reads a CSV file (ASN export) and returns a list of transaction-dicts
+  Reads a CSV file (ASN export) and yields transaction-dicts one row at a time,
   matching the shape expected by our categorization logic.
 
   Example:
@@ -48,37 +60,44 @@ def load_transactions_from_csv(csv_path: str) -> List[Dict[str, Any]]:
   Any rows with missing/empty booking_date are skipped.
   """
 
-  normalize_csv_data(csv_path)
+  # Per-row messages format the whole row, so only build them when debugging
+  debug_enabled = logger.isEnabledFor(logging.DEBUG)
 
-  txs: List[Dict[str, Any]] = []
-  with open(csv_path, newline='', encoding='utf-8') as csvfile:
+  # Single pass with a large read buffer: rows are normalized inline instead of
+  # rewriting the file first and reading it back
+  with open(csv_path, newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
     reader = csv.reader(csvfile)
     for row in reader:
       # Skip empty lines or malformed rows
       if not row or len(row) < 18 or not row[0].strip():
         continue
 
-      # 1) Extract fields by index
+      _normalize_row(row, debug_enabled)
+
+      # 1) Extract fields by index (the length check above guarantees columns 0-17)
       booking_date = row[0].strip()
-      counterparty_name = row[3].strip() if len(row) > 3 else ""
-      currency = row[9].strip() if len(row) > 9 else ""
-      amt_str = row[10].strip() if len(row) > 10 else "0"
+      counterparty_name = row[3].strip()
+      currency = row[9].strip()
       # Normalize decimal comma (if any) to dot
-      amt_str = amt_str.replace(',', '.')  
-      try:
-        amt = float(amt_str)
-      except ValueError:
-        amt = 0.0
+      amt_str = row[10].strip().replace(',', '.')
+      if _CANONICAL_AMOUNT_RE.match(amt_str):
+        # Common case: keep the string as-is, the sign tells debit from credit
+        is_debit = amt_str.startswith('-')
+      else:
+        try:
+          amt = float(amt_str)
+        except ValueError:
+          amt = 0.0
+        amt_str = f"{amt:.2f}"
+        is_debit = amt < 0
 
-      code  = row[13].strip() if len(row) > 13 else ""
-      sub_code = row[14].strip() if len(row) > 14 else ""
-      bank_desc = f"{code} {sub_code}".strip()
+      bank_desc = f"{row[13].strip()} {row[14].strip()}".strip()
 
-      rem = row[17].strip() if len(row) > 17 else ""
+      rem = row[17].strip()
       rem_list = [rem] if rem else []
 
       # 2) Determine credit/debit and set debtor/creditor names
-      if amt < 0:
+      if is_debit:
         credit_debit = "DBIT"
         debtor_name   = counterparty_name
         creditor_name = ""
@@ -90,7 +109,7 @@ def load_transactions_from_csv(csv_path: str) -> List[Dict[str, Any]]:
       tx = {
         "booking_date": booking_date,
         "transaction_amount": {
-          "amount": f"{amt:.2f}",
+          "amount": amt_str,
           "currency": currency
         },
         "credit_debit_indicator": credit_debit,
@@ -101,9 +120,7 @@ def load_transactions_from_csv(csv_path: str) -> List[Dict[str, Any]]:
         "creditor": {"name": creditor_name},
         "remittance_information": rem_list
       }
-      txs.append(tx)
-
-  return txs
+      yield tx
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Change some csv data to help with information extraction
@@ -114,27 +131,43 @@ def normalize_csv_data(csv_path: str) -> None:
   This is a placeholder function; actual normalization logic should be implemented as needed.
   """
 
-  with open(csv_path, newline='', encoding='utf-8') as csvfile:
+  with open(csv_path, newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
     reader = csv.reader(csvfile)
     rows = [row for row in reader]
 
+  # Per-row messages format the whole row, so only build them when debugging
+  debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
   for row in rows:
-    for uuid in SPAARPOT_UUID_MAP.keys():
-      if f"Referentie: {uuid}" in row[17]:
-        # Row contains a UUID reference, change it to the mapped name
-        name = SPAARPOT_UUID_MAP[uuid]
-        logger.info(f"Changing row {row} with {uuid} to {name}")
-        row[17] = row[17].replace(f"Referentie: {uuid}", f"- {name}")
-        logger.info(f"Updated row: {row}")
-        break
-         
-    if str(row).find("verzekeri ") != -1:
-      logger.info(f"Changing row {row} with 'verzekeri' to 'verzekering'")
-      row[17] = row[17].replace("verzekeri", "verzekering")
+    _normalize_row(row, debug_enabled)
   
   # Write the modified rows back to the CSV file
   with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
     writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL)
     writer.writerows(rows)
   
-  logger.info(f"CSV data normalized and saved to {csv_path}")
\ No newline at end of file
+  logger.info(f"CSV data normalized and saved to {csv_path}")
+
+def _normalize_row(row: List[str], debug_enabled: bool = False) -> None:
+  """
+  Normalizes the remittance information (column 17) of a single row in place.
+  Shared by the loader, which applies it while reading, and normalize_csv_data.
+  """
+  if len(row) < 18:
+    return
+
+  match = _SPAARPOT_REF_RE.search(row[17]) if _SPAARPOT_REF_RE is not None else None
+  if match:
+    # Row contains a UUID reference, change it to the mapped name
+    uuid = match.group(1)
+    name = SPAARPOT_UUID_MAP[uuid]
+    if debug_enabled:
+      logger.debug(f"Changing row {row} with {uuid} to {name}")
+    row[17] = row[17].replace(match.group(0), f"- {name}")
+    if debug_enabled:
+      logger.debug(f"Updated row: {row}")
+
+  if "verzekeri " in row[17]:
+    if debug_enabled:
+      logger.debug(f"Changing row {row} with 'verzekeri' to 'verzekering'")
+    row[17] = row[17].replace("verzekeri", "verzekering")
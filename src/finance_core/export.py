@@ -33,7 +33,8 @@ async def process_csv_file(file_path: Optional[str], ctx_or_interaction: Union[d
 
     if file_path:
         try:
-            transactions = load_transactions_from_csv(file_path)
+            # The loader is lazy; materialize once here since the session stores a list
+            transactions = list(load_transactions_from_csv(file_path))
             income, expenses = [], []
         except Exception as e:
             error_msg = f"❌ Failed to load CSV file: {str(e)}"
@@ -2,13 +2,162 @@
 
 import gspread
 import logging
+import random
+import threading
+from functools import lru_cache, wraps
 from typing import List, Dict, Any, Tuple, Optional
 from google.oauth2.service_account import Credentials
 from config_settings import GSHEET_NAME, GSHEET_TAB
 import os
+import re
+import time
 
 logger = logging.getLogger(__name__)
 
+# Sheet columns (first, last) holding each transaction type
+SHEET_COLUMNS = {
+    "expense": ("B", "E"),
+    "income": ("G", "J"),
+}
+
+SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# Opened worksheets per (credentials, spreadsheet, tab), reused by every exporter for a while
+WORKSHEET_CACHE_TTL = 600  # seconds
+_worksheet_cache: Dict[Tuple[str, str, str], Tuple[float, Any]] = {}
+
+def _last_row_of_range(a1_range: str) -> int:
+    """Return the last row number of an A1 range such as 'Blad1!B15:E15'"""
+    return int(re.search(r"(\d+)$", a1_range).group(1))
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503)
+
+_retry_state = threading.local()
+
+def retry_on_gspread_error(max_attempts: int = 5, base: float = 1.0, cap: float = 30.0):
+    """
+    Retry a Sheets call on rate limiting (429) and transient 5xx errors with exponential backoff.
+    
+    Honors a Retry-After header when the API sends one, otherwise waits
+    min(cap, base * 2**attempt) plus up to 0.5s of jitter. Other errors are raised immediately.
+    Nested decorated calls don't retry on their own; the outermost call retries as a whole.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_retry_state, "active", False):
+                return func(*args, **kwargs)
+            
+            _retry_state.active = True
+            try:
+                for attempt in range(max_attempts):
+                    try:
+                        return func(*args, **kwargs)
+                    except gspread.exceptions.APIError as e:
+                        response = getattr(e, "response", None)
+                        status = getattr(response, "status_code", None)
+                        if status not in RETRYABLE_STATUS_CODES or attempt == max_attempts - 1:
+                            raise
+                        
+                        retry_after = response.headers.get("Retry-After") if response is not None else None
+                        try:
+                            delay = float(retry_after)
+                        except (TypeError, ValueError):
+                            delay = min(cap, base * 2 ** attempt) + random.uniform(0, 0.5)
+                        
+                        logger.warning(f"⏳ Sheets API returned {status} in {func.__name__}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_attempts})")
+                        time.sleep(delay)
+            finally:
+                _retry_state.active = False
+        return wrapper
+    return decorator
+
+@lru_cache(maxsize=8)
+def _load_creds(credentials_path: str, mtime: float) -> Credentials:
+    """Read and parse the service account file; keyed on mtime so a rotated key is picked up"""
+    return Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
+
+@lru_cache(maxsize=4)
+def _build_client(credentials_path: str, mtime: float) -> gspread.Client:
+    """Authorize a client, once per credentials file version"""
+    client = gspread.authorize(_load_creds(credentials_path, mtime))
+    logger.info("✅ Google Sheets authorization successful")
+    return client
+
+# Longest description written to a cell; longer ones are cut and end in an ellipsis
+_DESCRIPTION_LIMIT = 500
+_ELLIPSIS = "..."
+
+@lru_cache(maxsize=1024)
+def _format_row(
+    date_str: str,
+    amount_str: str,
+    manually_switched: bool,
+    user_desc: str,
+    counterparty: str,
+    remittance: str,
+    category: str
+) -> Tuple[Any, ...]:
+    """
+    Build the [date, amount, description, category] row from already extracted fields.
+    
+    Kept pure and keyed on plain strings so repeated transactions within a batch
+    (same date, amount and description) are only formatted once.
+    """
+    try:
+        amount = float(amount_str)
+        # Check if transaction was manually switched from its original type
+        if manually_switched:
+            # If switched, use negative of the absolute amount to represent the opposite flow
+            amount_value = -abs(amount)
+        else:
+            # Normal case: use absolute amount
+            amount_value = abs(amount)
+    except ValueError:
+        amount_value = 0.0
+    
+    # Provided description has the highest priority, otherwise combine the bank data
+    if user_desc:
+        description = user_desc
+    elif counterparty and remittance:
+        description = f"{counterparty} - {remittance}"
+    else:
+        description = counterparty or remittance or "Unknown Transaction"
+    
+    # Truncate description if too long (Google Sheets cell limit)
+    if len(description) > _DESCRIPTION_LIMIT:
+        description = description[:_DESCRIPTION_LIMIT - len(_ELLIPSIS)] + _ELLIPSIS
+    
+    return (date_str, amount_value, description, category)
+
+# Shared stand-in for missing nested dicts; only ever read with .get, never mutated
+_EMPTY: Dict[str, Any] = {}
+
+def _format_tx(tx: Dict[str, Any], _get=dict.get) -> List[Any]:
+    """
+    Format a single transaction dict into a sheet row.
+    
+    Module-level with dict.get bound as a default argument, so formatting a whole
+    batch with map() avoids the per-call method lookups.
+    """
+    remittance = _get(tx, "remittance_information")
+    row = _format_row(
+        _get(tx, "booking_date", ""),
+        str((_get(tx, "transaction_amount") or _EMPTY).get("amount", "0")),
+        bool(_get(tx, "manually_switched", False)),
+        _get(tx, "description") or "",
+        # Fallback description sources from the bank data
+        (_get(tx, "debtor") or _EMPTY).get("name") or (_get(tx, "creditor") or _EMPTY).get("name") or "",
+        (remittance[0] if remittance else "") or "",
+        # Category should have been added during categorization
+        _get(tx, "category", "Uncategorized")
+    )
+    return list(row)
+
 class GoogleSheetsExporter:
     """Handles exporting categorized transactions to Google Sheets"""
     
@@ -22,6 +171,7 @@ class GoogleSheetsExporter:
         self.credentials_path = credentials_path
         self.client: Optional[gspread.Client] = None
         self.sheet = None
+        self._cached_row_count: Optional[int] = None  # Known grid size, kept in sync on resize/append
         
         if not os.path.exists(credentials_path):
             raise FileNotFoundError(f"Google credentials file not found: {credentials_path}")
@@ -29,17 +179,21 @@ class GoogleSheetsExporter:
     def _authorize(self):
         """Authorize and connect to Google Sheets"""
         if self.client is None:
-            scope = [
-                "https://spreadsheets.google.com/feeds",
-                "https://www.googleapis.com/auth/drive"
-            ]
-            creds = Credentials.from_service_account_file(self.credentials_path, scopes=scope)
-            self.client = gspread.authorize(creds)
-            logger.info("✅ Google Sheets authorization successful")
+            credentials_path = os.path.abspath(self.credentials_path)
+            self.client = _build_client(credentials_path, os.path.getmtime(credentials_path))
     
     def _get_worksheet(self):
         """Get the worksheet object"""
         if self.sheet is None:
+            cache_key = (self.credentials_path, GSHEET_NAME, GSHEET_TAB)
+            cached = _worksheet_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < WORKSHEET_CACHE_TTL:
+                self.sheet = cached[1]
+                # The shared handle's row_count misses rows other exporters appended, and a
+                # too-low count would make ensure_sheet_capacity shrink the sheet
+                self.refresh_row_count()
+                return self.sheet
+            
             self._authorize()
             if self.client is None:
                 raise Exception("Failed to authorize Google Sheets client")
@@ -50,7 +204,9 @@ class GoogleSheetsExporter:
                 
                 # Then try to get the specific worksheet
                 self.sheet = spreadsheet.worksheet(GSHEET_TAB)
+                self._cached_row_count = self.sheet.row_count
                 logger.info(f"✅ Opened worksheet: {GSHEET_NAME} - {GSHEET_TAB}")
+                _worksheet_cache[cache_key] = (time.monotonic(), self.sheet)
             
             except gspread.SpreadsheetNotFound:
                 raise Exception(f"Spreadsheet '{GSHEET_NAME}' not found. Please check the name and permissions.")
@@ -61,6 +217,23 @@ class GoogleSheetsExporter:
                 raise
         return self.sheet
 
+    def refresh_row_count(self) -> int:
+        """Re-read the sheet's row count from the API (use after the sheet was resized elsewhere)"""
+        sheet = self._get_worksheet()
+        metadata = sheet.spreadsheet.fetch_sheet_metadata()
+        for sheet_metadata in metadata["sheets"]:
+            properties = sheet_metadata["properties"]
+            if properties["sheetId"] == sheet.id:
+                self._cached_row_count = properties["gridProperties"]["rowCount"]
+                break
+        return self._cached_row_count
+
+    def record_written_row(self, row: int):
+        """Note that a write (e.g. values.append) reached this row, which grows the grid server-side"""
+        if self._cached_row_count is not None and row > self._cached_row_count:
+            self._cached_row_count = row
+
+    @retry_on_gspread_error()
     def ensure_sheet_capacity(self, required_row: int, buffer_rows: int = 50) -> bool:
         """
         Ensure the sheet has enough rows to accommodate the required row.
@@ -75,7 +248,7 @@ class GoogleSheetsExporter:
         """
         try:
             sheet = self._get_worksheet()
-            current_row_count = sheet.row_count
+            current_row_count = self._cached_row_count
             
             if required_row <= current_row_count:
                 logger.debug(f"✅ Sheet has sufficient capacity: {current_row_count} rows, need row {required_row}")
@@ -88,10 +261,14 @@ class GoogleSheetsExporter:
             
             # Resize the worksheet
             sheet.resize(rows=new_row_count)
+            self._cached_row_count = new_row_count
             
             logger.info(f"✅ Successfully expanded sheet to {new_row_count} rows")
             return True
             
+        except gspread.exceptions.APIError:
+            # Let the retry decorator see the API status
+            raise
         except Exception as e:
             logger.error(f"❌ Failed to expand sheet: {e}")
             raise Exception(f"Could not expand sheet to accommodate row {required_row}: {e}")
@@ -107,8 +284,8 @@ class GoogleSheetsExporter:
             True if the row is within bounds, False otherwise
         """
         try:
-            sheet = self._get_worksheet()
-            return target_row <= sheet.row_count
+            self._get_worksheet()
+            return target_row <= self._cached_row_count
         except Exception as e:
             logger.error(f"❌ Failed to check sheet bounds: {e}")
             return False
@@ -124,56 +301,9 @@ class GoogleSheetsExporter:
             List of values: [date, amount, description, category]
             Note: amount is returned as float for proper Google Sheets formatting
         """
-        # Extract date
-        date_str = transaction.get("booking_date", "")
-        
-        # Extract and format amount
-        amount_data = transaction.get("transaction_amount", {})
-        amount_str = amount_data.get("amount", "0")
-        try:
-            amount = float(amount_str)
-            # Check if transaction was manually switched from its original type
-            if transaction.get("manually_switched", False):
-                # If switched, use negative of the absolute amount to represent the opposite flow
-                amount_value = -abs(amount)
-            else:
-                # Normal case: use absolute amount
-                amount_value = abs(amount)
-        except ValueError:
-            amount_value = 0.0
-        
-        # Extract description from multiple sources
-        description_parts = []
-        
-        # Check for provided description first (highest priority)
-        if user_desc := transaction.get("description"):
-            description_parts.append(user_desc)
-        else:
-            # Fallback to auto-extracting from bank data
-            # Add counterparty information
-            debtor_name = transaction.get("debtor", {}).get("name", "")
-            creditor_name = transaction.get("creditor", {}).get("name", "")
-            counterparty = debtor_name or creditor_name
-            if counterparty:
-                description_parts.append(counterparty)
-            
-            # Add remittance information
-            remittance = transaction.get("remittance_information", [])
-            if remittance and remittance[0]:
-                description_parts.append(remittance[0])
-        
-        # Combine description parts
-        description = " - ".join(description_parts) if description_parts else "Unknown Transaction"
-        
-        # Truncate description if too long (Google Sheets cell limit)
-        if len(description) > 500:
-            description = description[:497] + "..."
-        
-        # Get category (should have been added during categorization)
-        category = transaction.get("category", "Uncategorized")
-        
-        return [date_str, amount_value, description, category]
+        return _format_tx(transaction)
     
+    @retry_on_gspread_error()
     def write_transactions_to_sheet(
         self, 
         income_transactions: List[Dict[str, Any]], 
@@ -192,39 +322,28 @@ class GoogleSheetsExporter:
         try:
             sheet = self._get_worksheet()
             
-            # Format transactions for Google Sheets
-            expense_values = [
-                self.format_transaction_for_sheet(tx) 
-                for tx in expense_transactions
-            ]
-            
-            income_values = [
-                self.format_transaction_for_sheet(tx) 
-                for tx in income_transactions
-            ]
-            
-            # Clear existing data in both expense and income columns
-            last_row = max(sheet.row_count, 100)  # Ensure we clear enough rows
-            ranges_to_clear = [f"B2:E{last_row}", f"G2:J{last_row}"]
-            sheet.batch_clear(ranges_to_clear)
-            logger.info("✅ Cleared existing data from Google Sheet")
+            # Format each transaction once; these row lists go to the API as-is
+            expense_values = list(map(_format_tx, expense_transactions))
+            income_values = list(map(_format_tx, income_transactions))
+            expense_count, income_count = len(expense_values), len(income_values)
             
-            # Write expenses to columns B-E (starting from row 2)
-            if expense_values:
-                end_row_exp = 1 + len(expense_values)  # +1 because we start from row 2
-                range_exp = f"B2:E{end_row_exp + 1}"
-                sheet.update(expense_values, range_exp)
-                logger.info(f"✅ Wrote {len(expense_values)} expenses to {range_exp}")
+            # Make sure every data row fits, then overwrite rows 2..last_row in a single
+            # values.batchUpdate. Each block is padded in place with blank rows down to the
+            # end of the sheet, which clears old data without a separate batch_clear call.
+            self.ensure_sheet_capacity(1 + max(expense_count, income_count))
+            last_row = max(self._cached_row_count, 1 + expense_count, 1 + income_count)
+            blank_row = ["", "", "", ""]
+            expense_values.extend([blank_row] * (last_row - 1 - expense_count))
+            income_values.extend([blank_row] * (last_row - 1 - income_count))
             
-            # Write incomes to columns G-J (starting from row 2)
-            if income_values:
-                end_row_inc = 1 + len(income_values)  # +1 because we start from row 2
-                range_inc = f"G2:J{end_row_inc + 1}"
-                sheet.update(income_values, range_inc)
-                logger.info(f"✅ Wrote {len(income_values)} incomes to {range_inc}")
+            sheet.batch_update([
+                {"range": f"B2:E{last_row}", "values": expense_values},
+                {"range": f"G2:J{last_row}", "values": income_values},
+            ], value_input_option="RAW")
+            logger.info(f"✅ Wrote {expense_count} expenses to B2:E and {income_count} incomes to G2:J (cleared through row {last_row})")
             
-            logger.info(f"🎉 Successfully exported {len(expense_values)} expenses and {len(income_values)} incomes to Google Sheets")
-            return len(expense_values), len(income_values)
+            logger.info(f"🎉 Successfully exported {expense_count} expenses and {income_count} incomes to Google Sheets")
+            return expense_count, income_count
             
         except Exception as e:
             logger.error(f"❌ Error writing to Google Sheets: {str(e)}")
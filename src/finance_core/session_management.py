@@ -1,11 +1,29 @@
 # finance_core/session_management.py
 
 import os
+import copy
 import json
+import shutil
 import uuid
-from typing import List, Dict, Any, Tuple, Optional
+import atexit
+import contextlib
+import threading
+from collections import deque
+from typing import List, Dict, Any, Set, Tuple, Optional, Deque, Iterable
 from datetime import datetime
-from config_settings import GSHEET_EXPENSE_START_ROW, GSHEET_INCOME_START_ROW
+
+# Advisory file locks keep the bot and helper scripts (e.g. retry_failed_transactions.py)
+# from interleaving session reads and writes; not available on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Prefer the C-coded orjson for session files, fall back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import session directory from config
 try:
@@ -26,151 +44,368 @@ except ImportError:
 
 os.makedirs(SESSION_DIR, exist_ok=True)
 
+# Pretty-printed session files are a debugging aid; production writes stay compact
+try:
+    from config_settings import SESSION_PRETTY_JSON
+except ImportError:
+    SESSION_PRETTY_JSON = False
+
+def _read_json(path: str) -> Any:
+    """Read a JSON file, using orjson when available"""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_json(path: str, data: Any) -> None:
+    """Write a JSON file atomically (temp file + rename), using orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_APPEND_NEWLINE
+        if SESSION_PRETTY_JSON:
+            option |= orjson.OPT_INDENT_2
+        data_bytes = orjson.dumps(data, option=option)
+    elif SESSION_PRETTY_JSON:
+        data_bytes = (json.dumps(data, indent=2) + "\n").encode("utf-8")
+    else:
+        data_bytes = (json.dumps(data, separators=(",", ":")) + "\n").encode("utf-8")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data_bytes)
+    os.replace(tmp_path, path)
+
+# Each user's session is a directory with one small file per concern, so hot paths
+# (cache lookups, existence checks) don't parse the bulk transaction lists:
+#   <SESSION_DIR>/<user_id>/transactions.json  remaining / income / expenses
+#   <SESSION_DIR>/<user_id>/cached.jsonl       one cached transaction per line
+# In memory, "cached" is a dict keyed by cache_id (insertion ordered), so lookups,
+# updates and removals don't scan the list.
+SESSION_PARTS = {
+    "transactions": ("remaining", "income", "expenses"),
+    "cached": ("cached",),
+}
+_PART_FILES = {
+    "transactions": "transactions.json",
+    "cached": "cached.jsonl",
+}
+
+# In-memory session cache: the loaded parts of each user's session, written back to
+# disk shortly after the last mutation instead of on every call. Each loaded part keeps
+# the signature of the file it matches, so a part another process rewrote (e.g.
+# retry_failed_transactions.py) is read again instead of being overwritten from memory.
+_SESSION_CACHE: Dict[int, Dict[str, Any]] = {}
+_LOADED_PARTS: Dict[int, Dict[str, Optional[Tuple[int, int, int]]]] = {}  # user_id -> part -> file signature
+_DIRTY: Dict[int, Set[str]] = {}  # user_id -> parts with unsaved changes
+_SESSION_LOCK = threading.RLock()
+_FLUSH_DELAY = 0.5  # seconds
+_flush_timer: Optional[threading.Timer] = None
+
 def get_session_path(user_id: int) -> str:
+    """Directory holding a user's session files"""
+    return os.path.join(SESSION_DIR, str(user_id))
+
+def _legacy_session_path(user_id: int) -> str:
+    """Single-file session layout used before the per-user directories"""
     return os.path.join(SESSION_DIR, f"{user_id}.json")
 
-def _load_full_session(user_id: int) -> Dict[str, Any]:
-    """Load the complete session data structure"""
-    path = get_session_path(user_id)
-    if not os.path.exists(path):
-        return {
-            "remaining": [],
-            "income": [],
-            "expenses": [],
-            "cached": [],
-            "sheet_positions": {
-                "expense_row": GSHEET_EXPENSE_START_ROW,
-                "income_row": GSHEET_INCOME_START_ROW,
-                "last_updated": None
-            }
-        }
+def _part_path(user_id: int, part: str) -> str:
+    return os.path.join(get_session_path(user_id), _PART_FILES[part])
 
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        # Ensure all required fields exist with defaults
-        return {
-            "remaining": data.get("remaining", []),
-            "income": data.get("income", []),
-            "expenses": data.get("expenses", []),
-            "cached": data.get("cached", []),
-            "sheet_positions": data.get("sheet_positions", {
-                "expense_row": GSHEET_EXPENSE_START_ROW,
-                "income_row": GSHEET_INCOME_START_ROW,
-                "last_updated": None
-            })
-        }
+def _part_signature(user_id: int, part: str) -> Optional[Tuple[int, int, int]]:
+    """Inode, mtime and size of a part's file (None if missing); atomic rewrites change the inode"""
+    try:
+        stat = os.stat(_part_path(user_id, part))
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
 
-def _save_full_session(user_id: int, session_data: Dict[str, Any]) -> None:
-    """Save the complete session data structure"""
-    with open(get_session_path(user_id), "w", encoding="utf-8") as f:
-        json.dump(session_data, f, indent=2)
-
-def save_session(user_id: int, remaining: List[Dict[str, Any]], income: List[Dict[str, Any]], expenses: List[Dict[str, Any]]) -> None:
-    session_data = _load_full_session(user_id)
-    session_data.update({
-        "remaining": remaining,
-        "income": income,
-        "expenses": expenses
+@contextlib.contextmanager
+def _user_file_lock(user_id: int, exclusive: bool):
+    """Hold an inter-process lock on a user's session directory while touching its files"""
+    if fcntl is None or not os.path.isdir(get_session_path(user_id)):
+        yield
+        return
+    with open(os.path.join(get_session_path(user_id), ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_jsonl(path: str) -> List[Any]:
+    """Read a JSON Lines file into a list"""
+    with open(path, "rb") as f:
+        lines = f.read().split(b"\n")
+    loads = orjson.loads if orjson is not None else json.loads
+    return [loads(line) for line in lines if line.strip()]
+
+def _write_jsonl(path: str, items: List[Any]) -> None:
+    """Write a list as a JSON Lines file atomically"""
+    if orjson is not None:
+        data_bytes = b"".join(orjson.dumps(item) + b"\n" for item in items)
+    else:
+        data_bytes = "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in items).encode("utf-8")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data_bytes)
+    os.replace(tmp_path, path)
+
+def _append_jsonl(path: str, item: Any) -> None:
+    """Append a single record to a JSON Lines file"""
+    if orjson is not None:
+        line = orjson.dumps(item) + b"\n"
+    else:
+        line = (json.dumps(item, separators=(",", ":")) + "\n").encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(line)
+
+def _migrate_legacy_session(user_id: int) -> None:
+    """Split an old <user_id>.json session into the per-user directory layout"""
+    legacy_path = _legacy_session_path(user_id)
+    if not os.path.exists(legacy_path) or os.path.exists(get_session_path(user_id)):
+        return
+    
+    data = _read_json(legacy_path)
+    os.makedirs(get_session_path(user_id), exist_ok=True)
+    _write_json(_part_path(user_id, "transactions"), {
+        "remaining": data.get("remaining", []),
+        "income": data.get("income", []),
+        "expenses": data.get("expenses", [])
     })
-    _save_full_session(user_id, session_data)
+    _write_jsonl(_part_path(user_id, "cached"), data.get("cached", []))
+    os.remove(legacy_path)
+
+def _read_part(user_id: int, part: str) -> Dict[str, Any]:
+    """Read one part of a session from disk, filling in defaults for missing fields"""
+    path = _part_path(user_id, part)
+    exists = os.path.exists(path)
+    if part == "transactions":
+        # Fill in missing lists in place; a complete file allocates nothing extra
+        data = _read_json(path) if exists else {}
+        for key in SESSION_PARTS["transactions"]:
+            data.setdefault(key, [])
+        return data
+    cached = _read_jsonl(path) if exists else []
+    return {"cached": {cached_tx["cache_id"]: cached_tx for cached_tx in cached}}
+
+def _load_parts(user_id: int, *parts: str) -> Dict[str, Any]:
+    """
+    Make sure the given parts of a user's session are in the cache and return the cached dict.
+    Parts without unsaved changes are read again when their file changed on disk.
+    """
+    with _SESSION_LOCK:
+        session_data = _SESSION_CACHE.setdefault(user_id, {})
+        loaded = _LOADED_PARTS.setdefault(user_id, {})
+        dirty = _DIRTY.get(user_id, ())
+        missing = [
+            part for part in parts
+            if part not in loaded or (part not in dirty and _part_signature(user_id, part) != loaded[part])
+        ]
+        if missing:
+            _migrate_legacy_session(user_id)
+            with _user_file_lock(user_id, exclusive=False):
+                for part in missing:
+                    session_data.update(_read_part(user_id, part))
+                    loaded[part] = _part_signature(user_id, part)
+        return session_data
 
-def load_session(user_id: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
-    session_data = _load_full_session(user_id)
-    return (
-        session_data["remaining"],
-        session_data["income"],
-        session_data["expenses"]
-    )
+def _mark_dirty(user_id: int, *parts: str) -> None:
+    """Mark parts of a session as changed; they are written to disk shortly after"""
+    global _flush_timer
+    with _SESSION_LOCK:
+        _DIRTY.setdefault(user_id, set()).update(parts)
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(_FLUSH_DELAY, flush_all_sessions)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+def _load_full_session(user_id: int) -> Dict[str, Any]:
+    """Load the complete session data structure (all parts, served from the in-memory cache)"""
+    return _load_parts(user_id, *SESSION_PARTS)
+
+def _save_full_session(user_id: int, session_data: Dict[str, Any]) -> None:
+    """Save the complete session data structure (all parts marked dirty)"""
+    with _SESSION_LOCK:
+        if _SESSION_CACHE.get(user_id) is not session_data:
+            _SESSION_CACHE[user_id] = session_data
+            # Every part is dirty, so the signatures are filled in when it's flushed
+            _LOADED_PARTS[user_id] = dict.fromkeys(SESSION_PARTS)
+        _mark_dirty(user_id, *SESSION_PARTS)
+
+def flush_session(user_id: int) -> None:
+    """Write a user's changed session parts to disk now"""
+    with _SESSION_LOCK:
+        parts = _DIRTY.pop(user_id, None)
+        if not parts:
+            return
+        session_data = _SESSION_CACHE[user_id]
+        os.makedirs(get_session_path(user_id), exist_ok=True)
+        loaded = _LOADED_PARTS.setdefault(user_id, {})
+        with _user_file_lock(user_id, exclusive=True):
+            for part in parts:
+                if part == "transactions":
+                    _write_json(_part_path(user_id, part), {key: session_data[key] for key in SESSION_PARTS[part]})
+                else:
+                    _write_jsonl(_part_path(user_id, part), list(session_data["cached"].values()))
+                loaded[part] = _part_signature(user_id, part)
+
+def flush_all_sessions() -> None:
+    """Write every session with unsaved changes to disk"""
+    global _flush_timer
+    with _SESSION_LOCK:
+        _flush_timer = None
+        for user_id in list(_DIRTY):
+            flush_session(user_id)
+
+# Don't lose pending writes when the process exits normally
+atexit.register(flush_all_sessions)
+
+@contextlib.contextmanager
+def session_transaction(user_id: int):
+    """
+    Load a user's session, let the caller mutate it, and save it once at the end.
+    
+    Use this for bulk updates (e.g. assigning sheet rows to many cached transactions)
+    instead of calling the single-item helpers in a loop. The session lock is held
+    for the whole block. The block works on a copy that replaces the cached session
+    only when it finishes, so nothing is changed or saved if the block raises.
+    """
+    with _SESSION_LOCK:
+        session_data = copy.deepcopy(_load_full_session(user_id))
+        yield session_data
+        _save_full_session(user_id, session_data)
+
+def save_session(user_id: int, remaining: Iterable[Dict[str, Any]], income: List[Dict[str, Any]], expenses: List[Dict[str, Any]]) -> None:
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "transactions")
+        session_data.update({
+            "remaining": list(remaining),
+            "income": list(income),
+            "expenses": list(expenses)
+        })
+        _mark_dirty(user_id, "transactions")
+
+def load_session(user_id: int) -> Tuple[Deque[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "transactions")
+        # Hand out copies so callers popping from these lists don't change the cache behind our back.
+        # Remaining is consumed from the front, so it comes as a deque (O(1) popleft)
+        return (
+            deque(session_data["remaining"]),
+            list(session_data["income"]),
+            list(session_data["expenses"])
+        )
+
+def peek_session(user_id: int) -> Tuple[Optional[Dict[str, Any]], int, int]:
+    """Return the next remaining transaction (or None) plus the remaining and processed counts, without copying the lists"""
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "transactions")
+        remaining = session_data["remaining"]
+        processed = len(session_data["income"]) + len(session_data["expenses"])
+        return (remaining[0] if remaining else None), len(remaining), processed
 
 def session_exists(user_id: int) -> bool:
-    return os.path.exists(get_session_path(user_id))
+    # Unsaved changes count; otherwise ask the disk, since helper scripts may create or clear sessions too
+    with _SESSION_LOCK:
+        if _DIRTY.get(user_id):
+            return True
+        return os.path.isdir(get_session_path(user_id)) or os.path.exists(_legacy_session_path(user_id))
 
 def clear_session(user_id: int) -> None:
-    path = get_session_path(user_id)
-    if os.path.exists(path):
-        os.remove(path)
+    with _SESSION_LOCK:
+        _SESSION_CACHE.pop(user_id, None)
+        _LOADED_PARTS.pop(user_id, None)
+        _DIRTY.pop(user_id, None)
+        shutil.rmtree(get_session_path(user_id), ignore_errors=True)
+        legacy_path = _legacy_session_path(user_id)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
 
 # === Cached Transactions Management ===
 
 def cache_transaction(user_id: int, transaction: Dict[str, Any], transaction_type: str, auto_description: str) -> str:
     """Cache a transaction with auto-generated description and dummy category"""
-    session_data = _load_full_session(user_id)
-    
-    cache_id = str(uuid.uuid4())[:8]  # Short UUID
-    
-    cached_transaction = {
-        "cache_id": cache_id,
-        "original_transaction": transaction,
-        "amount": transaction.get("transaction_amount", {}).get("amount", "0"),
-        "auto_description": auto_description,
-        "transaction_type": transaction_type,
-        "timestamp": datetime.now().isoformat(),
-        "sheet_row": None  # Will be set when uploaded to sheet
-    }
-    
-    session_data["cached"].append(cached_transaction)
-    _save_full_session(user_id, session_data)
-    
-    return cache_id
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "cached")
+        
+        cache_id = str(uuid.uuid4())[:8]  # Short UUID
+        
+        cached_transaction = {
+            "cache_id": cache_id,
+            "original_transaction": transaction,
+            "amount": transaction.get("transaction_amount", {}).get("amount", "0"),
+            "auto_description": auto_description,
+            "transaction_type": transaction_type,
+            "timestamp": datetime.now().isoformat(),
+            "sheet_row": None  # Will be set when uploaded to sheet
+        }
+        
+        session_data["cached"][cache_id] = cached_transaction
+        
+        if "cached" in _DIRTY.get(user_id, ()):
+            # A full rewrite is already pending and will include this record
+            _mark_dirty(user_id, "cached")
+        else:
+            # File matches memory, so appending one line keeps it in sync
+            os.makedirs(get_session_path(user_id), exist_ok=True)
+            with _user_file_lock(user_id, exclusive=True):
+                _append_jsonl(_part_path(user_id, "cached"), cached_transaction)
+                _LOADED_PARTS[user_id]["cached"] = _part_signature(user_id, "cached")
+        
+        return cache_id
 
 def get_cached_transactions(user_id: int) -> List[Dict[str, Any]]:
     """Get all cached transactions for a user"""
-    session_data = _load_full_session(user_id)
-    return session_data["cached"]
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "cached")
+        return list(session_data["cached"].values())
+
+def get_cached_transaction(user_id: int, cache_id: str) -> Optional[Dict[str, Any]]:
+    """Get a single cached transaction by cache_id, or None if it isn't cached"""
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "cached")
+        return session_data["cached"].get(cache_id)
+
+def peek_cached_transactions(user_id: int) -> Tuple[Optional[Dict[str, Any]], int]:
+    """Return the oldest cached transaction (or None) and how many are cached, without copying the cache"""
+    with _SESSION_LOCK:
+        cached = _load_parts(user_id, "cached")["cached"]
+        return next(iter(cached.values()), None), len(cached)
 
 def remove_cached_transaction(user_id: int, cache_id: str) -> bool:
     """Remove a cached transaction by cache_id"""
-    session_data = _load_full_session(user_id)
-    
-    for i, cached_tx in enumerate(session_data["cached"]):
-        if cached_tx["cache_id"] == cache_id:
-            del session_data["cached"][i]
-            _save_full_session(user_id, session_data)
-            return True
-    
-    return False
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "cached")
+        
+        if session_data["cached"].pop(cache_id, None) is None:
+            return False
+        
+        _mark_dirty(user_id, "cached")
+        return True
 
 def update_cached_transaction_row(user_id: int, cache_id: str, sheet_row: int) -> bool:
-    """Update the sheet row for a cached transaction"""
-    session_data = _load_full_session(user_id)
-    
-    for cached_tx in session_data["cached"]:
-        if cached_tx["cache_id"] == cache_id:
-            cached_tx["sheet_row"] = sheet_row
-            _save_full_session(user_id, session_data)
-            return True
-    
-    return False
-
-def clear_cached_transactions(user_id: int) -> None:
-    """Clear all cached transactions for a user"""
-    session_data = _load_full_session(user_id)
-    session_data["cached"] = []
-    _save_full_session(user_id, session_data)
-
-# === Sheet Positions Management ===
-
-def get_sheet_positions(user_id: int) -> Dict[str, Any]:
-    """Get sheet positions for a user"""
-    session_data = _load_full_session(user_id)
-    return session_data["sheet_positions"]
-
-def save_sheet_positions(user_id: int, expense_row: int, income_row: int) -> None:
-    """Save sheet positions for a user"""
-    session_data = _load_full_session(user_id)
-    session_data["sheet_positions"] = {
-        "expense_row": expense_row,
-        "income_row": income_row,
-        "last_updated": datetime.now().isoformat()
-    }
-    _save_full_session(user_id, session_data)
-
-def reset_sheet_positions(user_id: int) -> None:
-    """Reset sheet positions to defaults"""
-    session_data = _load_full_session(user_id)
-    session_data["sheet_positions"] = {
-        "expense_row": 2,
-        "income_row": 2,
-        "last_updated": None
-    }
-    _save_full_session(user_id, session_data)
+    """Update the sheet row for a single cached transaction (use session_transaction for bulk updates)"""
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "cached")
+        
+        cached_tx = session_data["cached"].get(cache_id)
+        if cached_tx is None:
+            return False
+        
+        cached_tx["sheet_row"] = sheet_row
+        _mark_dirty(user_id, "cached")
+        return True
+
+def clear_cached_transactions(user_id: int) -> int:
+    """Clear all cached transactions for a user, returning how many were removed"""
+    with _SESSION_LOCK:
+        session_data = _load_parts(user_id, "cached")
+        count = len(session_data["cached"])
+        session_data["cached"] = {}
+        # An empty cache is just a missing file
+        _DIRTY.get(user_id, set()).discard("cached")
+        path = _part_path(user_id, "cached")
+        if os.path.exists(path):
+            os.remove(path)
+        _LOADED_PARTS[user_id]["cached"] = None
+        return count
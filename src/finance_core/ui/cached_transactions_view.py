@@ -4,9 +4,12 @@ UI components for managing cached transactions.
 
 import discord
 from discord.ui import View, Button
-from typing import List
+from typing import List, Set
 import asyncio
 import logging
+from finance_core.session_management import clear_cached_transactions, get_cached_transactions
+from finance_core.ui.helpers import lock_for, respond, run_blocking, spawn
+from finance_core.ui.transaction_prompt import start_cached_transaction_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +20,7 @@ class CachedTransactionsView(View):
         super().__init__(timeout=300)  # 5 minute timeout
         self.user_id = user_id
         self.cached_transactions = cached_transactions
+        self._tasks: Set[asyncio.Task] = set()
         
         self.process_button = Button(
             label=f"🔧 Process Cached ({len(cached_transactions)})", 
@@ -32,37 +36,42 @@ class CachedTransactionsView(View):
         self.clear_button.callback = self.clear_all
         self.add_item(self.clear_button)
     
+    def _disable_all(self) -> None:
+        """Disable every button on the view"""
+        for item in self.children:
+            item.disabled = True
+    
     async def on_timeout(self):
         # Disable all buttons when view times out
-        self.process_button.disabled = True
-        self.clear_button.disabled = True
+        self._disable_all()
+        for task in list(self._tasks):
+            task.cancel()
     
     async def process_cached(self, interaction: discord.Interaction):
         """Start processing cached transactions one by one"""
-        from finance_core.session_management import session_exists
+        # Acknowledge first; this message is then turned into the first cached prompt
+        await interaction.response.defer()
         
-        if not self.cached_transactions:
-            await interaction.response.send_message("📭 No cached transactions to process.", ephemeral=True)
-            return
+        async with lock_for(self.user_id):
+            if self.process_button.disabled:
+                # A previous click already started (or cleared) processing
+                await respond(interaction, "⚠️ Cached transactions are already being handled.", ephemeral=True)
+                return
         
-        # Disable buttons to prevent duplicate processing
-        self.process_button.disabled = True
-        self.clear_button.disabled = True
+            if not self.cached_transactions:
+                await respond(interaction, "📭 No cached transactions to process.", ephemeral=True)
+                return
         
-        # Process cached transactions independently of CSV sessions
-        await interaction.response.send_message("🔧 Starting cached transaction processing...", ephemeral=True)
+            # Disable buttons to prevent duplicate processing
+            self._disable_all()
         
-        # Update the original message to show processing started
-        try:
-            await interaction.edit_original_response(view=self)
-        except Exception:
-            pass  # Message might already be updated
-        
-        # Start the actual processing workflow
-        await self._start_cached_processing(interaction)
+            # Process cached transactions independently of CSV sessions
+            await self._start_cached_processing(interaction)
 
     async def _start_cached_processing(self, interaction: discord.Interaction):
         """Start the cached transaction processing workflow"""
+        # Re-read the cache; entries may have been processed since this view was shown
+        self.cached_transactions = await run_blocking(get_cached_transactions, self.user_id)
         if not self.cached_transactions:
             await interaction.followup.send("✅ All cached transactions processed!", ephemeral=True)
             return
@@ -70,36 +79,41 @@ class CachedTransactionsView(View):
         # Get the first cached transaction
         cached_tx = self.cached_transactions[0]
         
-        # Import here to avoid circular imports
-        from finance_core.ui.transaction_prompt import start_cached_transaction_prompt
-        
-        await start_cached_transaction_prompt(interaction, self.user_id, cached_tx)
+        await start_cached_transaction_prompt(
+            interaction, self.user_id, cached_tx, status=f"🔧 Starting cached transaction processing ({len(self.cached_transactions)} cached)..."
+        )
     
     async def clear_all(self, interaction: discord.Interaction):
         """Clear all cached transactions"""
-        try:
-            from finance_core.session_management import clear_cached_transactions
-            
-            count = len(self.cached_transactions)
-            clear_cached_transactions(self.user_id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        async with lock_for(self.user_id):
+            if self.clear_button.disabled:
+                await respond(interaction, "⚠️ Cached transactions are already being handled.", ephemeral=True)
+                return
+        
+            try:
+                # Count what was actually cleared; the list this view was built from may be stale
+                count = await run_blocking(clear_cached_transactions, self.user_id)
+                self.cached_transactions = []
             
-            # Disable buttons
-            self.process_button.disabled = True
-            self.clear_button.disabled = True
+                # Disable buttons
+                self._disable_all()
             
-            await interaction.response.send_message(
-                f"🗑️ Cleared {count} cached transaction(s). Note: Dummy entries remain in your Google Sheet - you may want to clean them up manually.", 
-                ephemeral=True
-            )
+                await respond(
+                    interaction,
+                    f"🗑️ Cleared {count} cached transaction(s). Note: Dummy entries remain in your Google Sheet - you may want to clean them up manually.", 
+                    ephemeral=True
+                )
             
-            # Auto-delete after 8 seconds
-            response = await interaction.original_response()
-            asyncio.create_task(self._delete_after_delay(response, 8))
+                # Auto-delete after 8 seconds
+                response = await interaction.original_response()
+                spawn(self._tasks, self._delete_after_delay(response, 8))
             
-        except Exception as e:
-            logger.error(f"❌ Error clearing cached transactions: {e}")
-            await interaction.response.send_message(f"❌ Error clearing cached transactions: {str(e)}", ephemeral=True)
-    
+            except Exception as e:
+                logger.error(f"❌ Error clearing cached transactions: {e}")
+                await respond(interaction, f"❌ Error clearing cached transactions: {str(e)}", ephemeral=True)
+
     async def _delete_after_delay(self, message, delay: int):
         """Delete a message after a delay"""
         await asyncio.sleep(delay)
@@ -0,0 +1,43 @@
+# finance_core/ui/helpers.py
+"""
+Small async helpers shared by the Discord views and commands.
+"""
+
+import discord
+from typing import Dict, Optional, Set
+import asyncio
+
+# Per-user locks serializing the button callbacks that pop from a session, so a
+# double click can't process one transaction twice and skip the next
+_USER_LOCKS: Dict[int, asyncio.Lock] = {}
+
+def lock_for(user_id: int) -> asyncio.Lock:
+    """Return the callback lock for a user, creating it on first use"""
+    lock = _USER_LOCKS.get(user_id)
+    if lock is None:
+        lock = _USER_LOCKS[user_id] = asyncio.Lock()
+    return lock
+
+def spawn(tasks: Set[asyncio.Task], coro) -> asyncio.Task:
+    """
+    Start a helper task owned by a view or cog. The owner keeps a reference until the
+    task finishes (bare create_task results can be garbage collected mid-flight) and
+    cancels whatever is still pending when it times out or unloads.
+    """
+    task = asyncio.create_task(coro)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+    return task
+
+async def run_blocking(func, *args):
+    """Run a blocking session call in the default executor so the event loop keeps serving interactions"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+async def respond(interaction: discord.Interaction, content: str, ephemeral: bool = True, delete_after: Optional[float] = None):
+    """Send a message as the interaction response, or as a followup if it was already answered"""
+    if interaction.response.is_done():
+        message = await interaction.followup.send(content=content, ephemeral=ephemeral, wait=True)
+        if delete_after is not None:
+            await message.delete(delay=delete_after)
+    else:
+        await interaction.response.send_message(content=content, ephemeral=ephemeral, delete_after=delete_after)
@@ -2,11 +2,16 @@
 
 import discord
 from discord.ui import View, Button, Select, Modal, TextInput
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Sequence, Set, Deque
 import re
 import asyncio
 import logging
-from finance_core.session_management import load_session, save_session, clear_session
+from finance_core.session_management import (
+    load_session, save_session, clear_session, peek_session,
+    cache_transaction, get_cached_transaction, peek_cached_transactions, remove_cached_transaction
+)
+from finance_core.background_upload import queue_transaction_upload_async, queue_cached_replacement_async
+from finance_core.ui.helpers import lock_for, respond, run_blocking, spawn
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +31,135 @@ except ImportError:
     CATEGORIZATION_RULES_EXPENSE = {}
     CATEGORIZATION_RULES_INCOME = {}
 
+# Most rules are plain merchant names ("ODIDO", "Simpel|Vodafone"). Those skip the
+# regex engine and are matched with substring search on the lowercased text.
+_REGEX_METACHARS = frozenset(".^$*+?{}[]\\()")
+
+def _literal_alternatives(pattern: str) -> Optional[Tuple[str, ...]]:
+    """Return the lowercased alternatives of a pattern made only of literals, else None"""
+    alternatives = pattern.split("|")
+    if any(not alt or _REGEX_METACHARS.intersection(alt) for alt in alternatives):
+        return None
+    return tuple(alt.lower() for alt in alternatives)
+
+def _literal_prefix(pattern: str) -> Optional[str]:
+    """
+    Return the lowercased literal run a regex rule starts with ("vrij geld " for
+    "vrij geld (\\w+)"), which any match has to contain, or None if it has none.
+    """
+    if "|" in pattern:
+        return None
+    end = 0
+    while end < len(pattern) and pattern[end] not in _REGEX_METACHARS:
+        end += 1
+    if end < len(pattern) and pattern[end] in "?*{":
+        # The last literal character is optional, so it isn't required
+        end -= 1
+    return pattern[:end].lower() if end >= 3 else None
+
+def _find_literal(text: str, literals: Tuple[str, ...]) -> Optional[str]:
+    """Leftmost literal in text (earliest alternative on ties), the one the regex would match"""
+    best, found = -1, None
+    for literal in literals:
+        i = text.find(literal)
+        if i != -1 and (best == -1 or i < best):
+            best, found = i, literal
+    return found
+
+def _compile_rules(rules: Dict[str, Tuple[str, Any]]) -> List[Tuple[re.Pattern, Optional[Tuple[str, ...]], Optional[str], str, Any]]:
+    """
+    Compile categorization rule patterns once, skipping (and logging) any that are invalid.
+    Each rule becomes (pattern, literal alternatives, literal prefix, template, category).
+    """
+    compiled = []
+    for pattern, (description_template, category) in rules.items():
+        try:
+            compiled.append((
+                re.compile(pattern, re.IGNORECASE),
+                _literal_alternatives(pattern),
+                _literal_prefix(pattern),
+                description_template,
+                category
+            ))
+        except re.error as e:
+            logger.warning(f"⚠️ Skipping invalid categorization rule {pattern!r}: {e}")
+    return compiled
+
+# Global inline flags such as the (?i) some rules start with are only allowed at
+# the very start of a pattern, so they become scoped groups inside the alternation
+_LEADING_FLAGS_RE = re.compile(r"^\(\?([imsx]+)\)")
+
+def _combine_rules(rules: List[Tuple[re.Pattern, Optional[Tuple[str, ...]], Optional[str], str, Any]]) -> Optional[re.Pattern]:
+    """
+    Build one alternation (?P<r0>...)|(?P<r1>...)|... over compiled rules, so a
+    transaction that matches no rule is rejected in a single scan. Returns None
+    (plain per-rule matching) if there are no rules or they can't be combined.
+    """
+    if not rules:
+        return None
+    parts = []
+    for i, (pattern, *_) in enumerate(rules):
+        source = pattern.pattern
+        if flags := _LEADING_FLAGS_RE.match(source):
+            source = f"(?{flags.group(1)}:{source[flags.end():]})"
+        parts.append(f"(?P<r{i}>{source})")
+    try:
+        return re.compile("|".join(parts), re.IGNORECASE)
+    except re.error as e:
+        logger.warning(f"⚠️ Could not combine categorization rules, matching them one by one: {e}")
+        return None
+
+_COMPILED_RULES_EXPENSE = _compile_rules(CATEGORIZATION_RULES_EXPENSE)
+_COMPILED_RULES_INCOME = _compile_rules(CATEGORIZATION_RULES_INCOME)
+# Bound search methods of the alternations (None when rules are matched one by one)
+_COMBINED_RULES_EXPENSE = _combine_rules(_COMPILED_RULES_EXPENSE)
+_COMBINED_RULES_INCOME = _combine_rules(_COMPILED_RULES_INCOME)
+_SEARCH_RULES_EXPENSE = _COMBINED_RULES_EXPENSE.search if _COMBINED_RULES_EXPENSE else None
+_SEARCH_RULES_INCOME = _COMBINED_RULES_INCOME.search if _COMBINED_RULES_INCOME else None
+
+# Bank codes/prefixes stripped from suggested descriptions, removed in a single
+# pass each (same substrings the previous chained str.replace calls dropped)
+_COUNTERPARTY_NOISE_RE = re.compile("NL|INGB")
+_REMITTANCE_NOISE_RE = re.compile("SEPA|IBAN")
+
+# Views track the transaction type as an is_income bool; these tuples are indexed
+# by it (False -> expense, True -> income). The strings are only needed for the
+# session/upload APIs and CATEGORY_OPTIONS.
+_TYPE_NAMES = ("expense", "income")
+_TYPE_DISPLAY = ("💸 Expense", "💵 Income")
+# Category membership per type, for the suggestion check on every type switch
+_CATEGORY_SETS = tuple(frozenset(CATEGORY_OPTIONS[transaction_type]) for transaction_type in _TYPE_NAMES)
+
+# Type switches closer together than this (seconds) are treated as one tap
+_SWITCH_DEBOUNCE = 0.25
+
+def _is_income(transaction: Dict[str, Any]) -> bool:
+    """Anything but a CRDT indicator counts as an expense"""
+    return transaction.get("credit_debit_indicator") == "CRDT"
+
+# Select options are built once per category (capped at Discord's 25 options per
+# select) and shared between prompts; the lists and options are read-only
+_SELECT_OPTIONS = tuple(
+    [discord.SelectOption(label=cat) for cat in CATEGORY_OPTIONS[transaction_type][:25]]
+    for transaction_type in _TYPE_NAMES
+)
+# Position of each category in those lists, so the pre-selected one is found without a scan
+_SELECT_INDEX = tuple(
+    {option.label: i for i, option in enumerate(options)}
+    for options in _SELECT_OPTIONS
+)
+
+def _category_options(is_income: bool, selected_category: Optional[str]) -> List[discord.SelectOption]:
+    """Return the select options for a transaction type, with the selected category pre-selected"""
+    index = _SELECT_INDEX[is_income].get(selected_category) if selected_category else None
+    if index is None:
+        # Nothing to pre-select: hand out the shared list itself
+        return _SELECT_OPTIONS[is_income]
+    options = list(_SELECT_OPTIONS[is_income])
+    # Only the pre-selected entry gets its own object
+    options[index] = discord.SelectOption(label=selected_category, default=True)
+    return options
+
 
 def apply_categorization_rules(transaction: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
     """
@@ -33,8 +167,10 @@ def apply_categorization_rules(transaction: Dict[str, Any]) -> Tuple[Optional[st
     Returns (suggested_category, suggested_description) or (None, None) if no match.
     """
     # Determine transaction type
-    is_income = transaction.get("credit_debit_indicator") == "CRDT"
-    rules = CATEGORIZATION_RULES_INCOME if is_income else CATEGORIZATION_RULES_EXPENSE
+    if _is_income(transaction):
+        rules, search_rules = _COMPILED_RULES_INCOME, _SEARCH_RULES_INCOME
+    else:
+        rules, search_rules = _COMPILED_RULES_EXPENSE, _SEARCH_RULES_EXPENSE
     
     if not rules:
         return None, None
@@ -44,51 +180,85 @@ def apply_categorization_rules(transaction: Dict[str, Any]) -> Tuple[Optional[st
     
     # Add counterparty names
     if debtor_name := transaction.get("debtor", {}).get("name"):
-        search_texts.append(debtor_name.lower())
+        search_texts.append(debtor_name)
     if creditor_name := transaction.get("creditor", {}).get("name"):
-        search_texts.append(creditor_name.lower())
+        search_texts.append(creditor_name)
     
     # Add remittance information
     remittance = transaction.get("remittance_information", [])
     for item in remittance:
         if item:
-            search_texts.append(item.lower())
+            search_texts.append(item)
     
-    # Combine all text for searching
-    combined_text = " ".join(search_texts)
+    # Combine all text for searching, lowercased in one pass (literal rules rely on it)
+    combined_text = " ".join(search_texts).lower()
+    if not combined_text:
+        return None, None
+
+    if search_rules is not None:
+        first_hit = search_rules(combined_text)
+        if first_hit is None:
+            return None, None
+        # The alternation returns the leftmost hit, while rules win in order of
+        # definition: only the rules up to the one that hit can be the answer
+        rules = rules[:int(first_hit.lastgroup[1:]) + 1]
     
     # Try each rule pattern
-    for pattern, (description_template, category) in rules.items():
-        match = re.search(pattern, combined_text, re.IGNORECASE)
-        if match:
-            # Generate description using template
-            if "{c}" in description_template:
-                # Extract the matched text for {c} placeholder
-                matched_text = match.group(1) if match.groups() else match.group(0)
-                suggested_description = description_template.replace("{c}", matched_text.title())
-            else:
-                suggested_description = description_template
-            
-            return category.value, suggested_description
+    for pattern, literals, prefix, description_template, category in rules:
+        if literals is not None:
+            # The text is lowercased, so the literal found is exactly the matched text
+            matched_text = _find_literal(combined_text, literals)
+            if matched_text is None:
+                continue
+        else:
+            # Regexes only run when the literal text they start with is present
+            if prefix is not None and prefix not in combined_text:
+                continue
+            match = pattern.search(combined_text)
+            if not match:
+                continue
+            # Extract the matched text for {c} placeholder: the first group if the
+            # pattern has one (the compiled pattern's group count, no tuple needed)
+            matched_text = match.group(1 if pattern.groups else 0)
+
+        # Generate description using template
+        if "{c}" in description_template:
+            suggested_description = description_template.replace("{c}", matched_text.title())
+        else:
+            suggested_description = description_template
+        
+        return category.value, suggested_description
     
     return None, None
 
+def _progress(processed: int, remaining: int, note: str = "") -> str:
+    """Progress suffix shown after each action, e.g. (3/10 done, 1 skipped)"""
+    return f"({processed}/{processed + remaining} done{note})"
+
+def _description_input(suggested_description: str) -> TextInput:
+    """Description field shared by both modals, pre-filled with the suggestion"""
+    # Discord caps the field at 500 characters and the placeholder at 100
+    default = suggested_description[:500]
+    placeholder_text = default[:95] + "..." if len(default) > 95 else default
+    return TextInput(
+        label="Transaction Description",
+        placeholder=placeholder_text,
+        max_length=500,
+        required=False,  # Allow empty to use auto-description
+        style=discord.TextStyle.paragraph,
+        default=default  # Pre-fill with suggestion
+    )
+
+
 class DescriptionModal(Modal):
     def __init__(self, transaction_view, suggested_description: str):
         super().__init__(title="Confirm Transaction & Description")
         self.transaction_view = transaction_view
+        # The view is reused for the next transaction, so remember which one this modal is for
+        self.transaction = transaction_view.transaction
+        self.suggested_description = suggested_description
         
-        # Truncate placeholder to Discord's 100 character limit
-        placeholder_text = suggested_description[:95] + "..." if len(suggested_description) > 95 else suggested_description
-        
-        self.description_input = TextInput(
-            label="Transaction Description",
-            placeholder=placeholder_text,
-            max_length=500,
-            required=False,  # Allow empty to use auto-description
-            style=discord.TextStyle.paragraph,
-            default=suggested_description[:500]  # Pre-fill with suggestion
-        )
+        self.description_input = _description_input(suggested_description)
         self.add_item(self.description_input)
     
     async def on_submit(self, interaction: discord.Interaction):
@@ -97,7 +267,7 @@ class DescriptionModal(Modal):
         self.transaction_view.custom_description = custom_desc
         
         # Complete the transaction with the description
-        await self.transaction_view.complete_transaction(interaction, custom_desc)
+        await self.transaction_view.complete_transaction(interaction, custom_desc, self.transaction, self.suggested_description)
     
     async def _delete_after_delay(self, interaction: discord.Interaction, delay: int):
         await asyncio.sleep(delay)
@@ -106,53 +276,58 @@ class DescriptionModal(Modal):
         except:
             pass  # Message might already be deleted
 
-class TransactionView(View):
-    def __init__(self, user_id: int, transaction: Dict[str, Any]):
+class _BaseTransactionView(View):
+    """
+    Shared parts of the regular and cached transaction prompts: the type switch,
+    the category select and the description suggestions.
+    """
+
+    def __init__(self, user_id: int):
         super().__init__(timeout=300)  # 5 minute timeout instead of None
         self.user_id = user_id
+        self._tasks: Set[asyncio.Task] = set()
+        # Event loop time of the last type switch, to swallow accidental double taps
+        self._last_switch = float("-inf")
+
+        self.switch_type_button = Button(style=discord.ButtonStyle.secondary)
+        self.switch_type_button.callback = self.switch_type
+        self.add_item(self.switch_type_button)
+
+        # Category select; options and placeholder are filled in by _set_transaction()
+        self.category_select = Select()
+        self.category_select.callback = self.select_category
+        self.add_item(self.category_select)
+
+    def _set_transaction(self, transaction: Dict[str, Any]) -> None:
+        """Point the view at a transaction and apply the smart defaults for it"""
         self.transaction = transaction
-        self.transaction_type = "income" if transaction["credit_debit_indicator"] == "CRDT" else "expense"
+        self.is_income = _is_income(transaction)
         self.custom_description = None
+        self._fallback_description = None
         
         # Apply categorization rules to get smart defaults
         suggested_category, suggested_description = apply_categorization_rules(transaction)
+        self._rule_suggestion = (suggested_category, suggested_description)
         self.selected_category = suggested_category
         self.suggested_description = suggested_description
 
-        self.switch_type_button = Button(label=f"Switch to {'expense' if self.transaction_type == 'income' else 'income'}", style=discord.ButtonStyle.secondary)
-        self.switch_type_button.callback = self.switch_type
-        self.add_item(self.switch_type_button)
-
-        # Limit categories to 25 (Discord's maximum for select options)
-        categories = CATEGORY_OPTIONS[self.transaction_type][:25]
-        
-        # Create category select with smart default
-        category_options = []
-        for cat in categories:
-            option = discord.SelectOption(label=cat)
-            # Pre-select the suggested category if we have one
-            if suggested_category and cat == suggested_category:
-                option.default = True
-            category_options.append(option)
-        
-        self.category_select = Select(
-            placeholder="Select a category" if not suggested_category else f"✨ Suggested: {suggested_category}",
-            options=category_options
-        )
-        self.category_select.callback = self.select_category
-        self.add_item(self.category_select)
+        self.switch_type_button.label = f"Switch to {_TYPE_NAMES[not self.is_income]}"
 
-        self.confirm_button = Button(label="Confirm & Add Description", style=discord.ButtonStyle.success)
-        self.confirm_button.callback = self.confirm_transaction
-        self.add_item(self.confirm_button)
+        # Category select with smart default
+        self.category_select.placeholder = "Select a category" if not suggested_category else f"✨ Suggested: {suggested_category}"
+        self.category_select.options = _category_options(self.is_income, suggested_category)
 
-        self.skip_button = Button(label="Skip Transaction", style=discord.ButtonStyle.secondary)
-        self.skip_button.callback = self.skip_transaction
-        self.add_item(self.skip_button)
+    @property
+    def transaction_type(self) -> str:
+        """The "income"/"expense" label the session and upload APIs expect"""
+        return _TYPE_NAMES[self.is_income]
 
-        self.cache_button = Button(label="Cache for Later", style=discord.ButtonStyle.secondary)
-        self.cache_button.callback = self.cache_transaction
-        self.add_item(self.cache_button)
+    @property
+    def fallback_description(self) -> str:
+        """Description extracted from the transaction data, computed once per view"""
+        if self._fallback_description is None:
+            self._fallback_description = self._extract_suggested_description(self.transaction)
+        return self._fallback_description
 
     def _extract_suggested_description(self, transaction: Dict[str, Any]) -> str:
         """Extract a suggested description from transaction data"""
@@ -162,18 +337,19 @@ class TransactionView(View):
         debtor_name = transaction.get("debtor", {}).get("name", "")
         creditor_name = transaction.get("creditor", {}).get("name", "")
         counterparty = debtor_name or creditor_name
+        cleaned_counterparty = ""
         if counterparty:
             # Clean up common bank codes/prefixes to make it more readable
-            cleaned_counterparty = counterparty.replace("NL", "").replace("INGB", "").strip()
+            cleaned_counterparty = _COUNTERPARTY_NOISE_RE.sub("", counterparty).strip()
             description_parts.append(cleaned_counterparty)
         
         # Add first line of remittance information (transaction details)
         remittance = transaction.get("remittance_information", [])
         if remittance and remittance[0]:
-            first_line = remittance[0].strip()
-            if first_line and first_line not in description_parts:
-                # Clean up common patterns to make it more readable
-                cleaned_remittance = first_line.replace("SEPA", "").replace("IBAN", "").strip()
+            # Clean up common patterns to make it more readable
+            cleaned_remittance = _REMITTANCE_NOISE_RE.sub("", remittance[0]).strip()
+            # Compare cleaned to cleaned, so a line that only repeats the counterparty is dropped
+            if cleaned_remittance and cleaned_remittance != cleaned_counterparty:
                 description_parts.append(cleaned_remittance)
         
         # Combine and limit length for Discord placeholder
@@ -185,26 +361,33 @@ class TransactionView(View):
         # Limit to 90 chars to leave room for "..." if needed
         return suggested[:90]
 
+    def _disable_all(self) -> None:
+        """Disable every button and select on the view"""
+        for item in self.children:
+            item.disabled = True
+
     async def on_timeout(self):
         # Disable all items when view times out
-        self.switch_type_button.disabled = True
-        self.category_select.disabled = True
-        self.confirm_button.disabled = True
-        self.skip_button.disabled = True
-        self.cache_button.disabled = True
+        self._disable_all()
+        for task in list(self._tasks):
+            task.cancel()
 
     async def switch_type(self, interaction: discord.Interaction):
-        self.transaction_type = "expense" if self.transaction_type == "income" else "income"
-        self.switch_type_button.label = f"Switch to {'expense' if self.transaction_type == 'income' else 'income'}"
+        now = asyncio.get_running_loop().time()
+        if now - self._last_switch < _SWITCH_DEBOUNCE:
+            # A second tap right after the first would just flip the type back
+            await interaction.response.defer()
+            return
+        self._last_switch = now
+
+        self.is_income = not self.is_income
+        self.switch_type_button.label = f"Switch to {_TYPE_NAMES[not self.is_income]}"
         
-        # Re-apply categorization rules for the new transaction type
-        suggested_category, suggested_description = apply_categorization_rules(self.transaction)
+        # The rules only depend on the transaction, so reuse the suggestion computed up front
+        suggested_category, suggested_description = self._rule_suggestion
         
         # Only update suggestions if they match the new transaction type
-        if self.transaction_type == "income" and suggested_category in CATEGORY_OPTIONS["income"]:
-            self.selected_category = suggested_category
-            self.suggested_description = suggested_description
-        elif self.transaction_type == "expense" and suggested_category in CATEGORY_OPTIONS["expense"]:
+        if suggested_category in _CATEGORY_SETS[self.is_income]:
             self.selected_category = suggested_category
             self.suggested_description = suggested_description
         else:
@@ -212,17 +395,8 @@ class TransactionView(View):
             self.selected_category = None
             self.suggested_description = None
         
-        # Update category options with limit and smart defaults
-        categories = CATEGORY_OPTIONS[self.transaction_type][:25]
-        category_options = []
-        for cat in categories:
-            option = discord.SelectOption(label=cat)
-            # Pre-select the suggested category if we have one
-            if self.selected_category and cat == self.selected_category:
-                option.default = True
-            category_options.append(option)
-        
-        self.category_select.options = category_options
+        # Update category options with smart defaults
+        self.category_select.options = _category_options(self.is_income, self.selected_category)
         self.category_select.placeholder = "Select a category" if not self.selected_category else f"✨ Suggested: {self.selected_category}"
         
         await interaction.response.edit_message(view=self)
@@ -231,422 +405,396 @@ class TransactionView(View):
         self.selected_category = self.category_select.values[0]
         await interaction.response.defer()
 
-    async def confirm_transaction(self, interaction: discord.Interaction):
-        if not self.selected_category:
-            await interaction.response.send_message("⚠️ Please select a category first.", ephemeral=True)
-            # Auto-delete after 3 seconds
-            asyncio.create_task(self._delete_response_after_delay(interaction, 3))
-            return
+    async def _delete_response_after_delay(self, interaction: discord.Interaction, delay: int):
+        await asyncio.sleep(delay)
+        try:
+            await interaction.delete_original_response()
+        except:
+            pass  # Message might already be deleted
 
-        # Use smart suggested description if available, otherwise fall back to extracted description
-        smart_suggestion = self.suggested_description
-        if not smart_suggestion:
-            smart_suggestion = self._extract_suggested_description(self.transaction)
-        
-        # Open description modal with smart suggestion
-        modal = DescriptionModal(self, smart_suggestion)
-        await interaction.response.send_modal(modal)
+class TransactionView(_BaseTransactionView):
+    def __init__(self, user_id: int, transaction: Dict[str, Any]):
+        super().__init__(user_id)
 
-    async def complete_transaction(self, interaction: discord.Interaction, description: str):
-        """Complete the transaction after description is provided"""
-        remaining, income, expenses = load_session(self.user_id)
+        self.confirm_button = Button(label="Confirm & Add Description", style=discord.ButtonStyle.success)
+        self.confirm_button.callback = self.confirm_transaction
+        self.add_item(self.confirm_button)
+
+        self.skip_button = Button(label="Skip Transaction", style=discord.ButtonStyle.secondary)
+        self.skip_button.callback = self.skip_transaction
+        self.add_item(self.skip_button)
+
+        self.cache_button = Button(label="Cache for Later", style=discord.ButtonStyle.secondary)
+        self.cache_button.callback = self.cache_transaction
+        self.add_item(self.cache_button)
+
+        self.update(transaction)
+
+    def update(self, transaction: Dict[str, Any]) -> None:
+        """Point the view at a (new) transaction, resetting all per-transaction state"""
+        self._set_transaction(transaction)
+        # Set once a button has consumed this transaction, so a second click can't pop the next one
+        self.handled = False
+
+    async def _load_session_at(
+        self, interaction: discord.Interaction, transaction: Dict[str, Any]
+    ) -> Optional[Tuple[Deque[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Load the session if `transaction` is still next in line, otherwise tell the user and return None"""
+        remaining, income, expenses = await run_blocking(load_session, self.user_id)
         if not remaining:
-            await interaction.response.send_message("❌ No transactions remaining.", ephemeral=True)
-            asyncio.create_task(self._delete_response_after_delay(interaction, 3))
-            return
+            await respond(interaction, "❌ No transactions remaining.", ephemeral=True, delete_after=3)
+            return None
+        # Another prompt on the same session (e.g. one opened by /resume) may have taken it already.
+        # Compare by value: the session can be reloaded from disk into new dicts
+        if remaining[0] != transaction:
+            await respond(interaction, "⚠️ This transaction was already handled.", ephemeral=True, delete_after=3)
+            return None
+        return remaining, income, expenses
+
+    async def confirm_transaction(self, interaction: discord.Interaction):
+        async with lock_for(self.user_id):
+            if self.handled:
+                await respond(interaction, "⚠️ This transaction was already handled.", ephemeral=True, delete_after=3)
+                return
+            
+            if not self.selected_category:
+                # Auto-delete after 3 seconds
+                await respond(interaction, "⚠️ Please select a category first.", ephemeral=True, delete_after=3)
+                return
 
-        tx = remaining.pop(0)
-        categorized_tx = {**tx, "category": self.selected_category}
-        
-        # Track if transaction type was manually switched from original
-        original_type = "income" if tx["credit_debit_indicator"] == "CRDT" else "expense"
-        if self.transaction_type != original_type:
-            categorized_tx["manually_switched"] = True
-        
-        # Always add a description - either custom or auto-generated
-        description_source = ""
-        if description:
-            categorized_tx["description"] = description
-            description_source = " + custom description"
-        else:
             # Use smart suggested description if available, otherwise fall back to extracted description
-            if self.suggested_description:
-                categorized_tx["description"] = self.suggested_description
-                description_source = " + smart description"
-            else:
-                auto_desc = self._extract_suggested_description(self.transaction)
-                categorized_tx["description"] = auto_desc
-                description_source = " + auto-description"
+            smart_suggestion = self.suggested_description
+            if not smart_suggestion:
+                smart_suggestion = self.fallback_description
+        
+            # Open description modal with smart suggestion
+            modal = DescriptionModal(self, smart_suggestion)
+            await interaction.response.send_modal(modal)
+
+    async def complete_transaction(
+        self,
+        interaction: discord.Interaction,
+        description: str,
+        transaction: Optional[Dict[str, Any]] = None,
+        suggested: Optional[str] = None
+    ):
+        """Complete the transaction after description is provided"""
+        if transaction is None:
+            transaction = self.transaction
+        # Acknowledge right away (loading the session may hit disk and Discord only waits
+        # 3 seconds); the prompt message itself is then edited to show the next transaction
+        await interaction.response.defer()
         
-        if self.transaction_type == "income":
-            income.append(categorized_tx)
-        else:
-            expenses.append(categorized_tx)
+        async with lock_for(self.user_id):
+            if self.handled or self.transaction is not transaction:
+                await respond(interaction, "⚠️ This transaction was already handled.", ephemeral=True, delete_after=3)
+                return
+            
+            session = await self._load_session_at(interaction, transaction)
+            if session is None:
+                return
+            remaining, income, expenses = session
 
-        save_session(self.user_id, remaining, income, expenses)
+            tx = remaining.popleft()
+            self.handled = True
+            # tx is still shared with the session cache (and the flush thread) until
+            # save_session runs, so the categorized record is a copy
+            categorized_tx = {**tx, "category": self.selected_category}
         
-        # Queue transaction for immediate upload to Google Sheets
-        try:
-            from finance_core.background_upload import queue_transaction_upload
-            
-            # Check if this is a cached transaction being processed
-            if '_cache_id' in tx:
-                # This is a processed cached transaction - remove from cache
-                from finance_core.session_management import remove_cached_transaction
-                cache_id = tx['_cache_id']
-                remove_cached_transaction(self.user_id, cache_id)
-                
-                # Remove the cache marker before uploading
-                categorized_tx = {k: v for k, v in categorized_tx.items() if k != '_cache_id'}
-                queue_transaction_upload(categorized_tx, self.transaction_type, self.user_id)
-                upload_indicator = " 🔄📤"
-                logger.info(f"Processed cached transaction {cache_id}")
+            # Track if transaction type was manually switched from original
+            if self.is_income != _is_income(tx):
+                categorized_tx["manually_switched"] = True
+        
+            # Always add a description - either custom or auto-generated
+            description_source = ""
+            if description:
+                categorized_tx["description"] = description
+                description_source = " + custom description"
             else:
-                # Regular transaction
-                queue_transaction_upload(categorized_tx, self.transaction_type, self.user_id)
-                upload_indicator = " 📤"
-        except Exception as e:
-            logger.error(f"❌ Failed to queue transaction for upload: {e}")
-            upload_indicator = ""
-
-        # Disable all buttons and selects to prevent further interactions
-        self.switch_type_button.disabled = True
-        self.category_select.disabled = True
-        self.confirm_button.disabled = True
-        self.skip_button.disabled = True
-        self.cache_button.disabled = True
-
-        # Send concise confirmation message
-        progress_info = f"({len(income) + len(expenses)}/{len(remaining) + len(income) + len(expenses)} done)"
-        
-        # Add smart categorization indicator
-        smart_indicator = ""
-        if self.suggested_description and not description:
-            smart_indicator = " 🤖"
-        
-        if remaining:
-            await interaction.response.send_message(
-                content=f"✅ Categorized as {self.selected_category}{description_source}{smart_indicator}{upload_indicator} {progress_info}", 
-                ephemeral=True
-            )
-            # Update the original message to disable buttons immediately
+                # An empty modal falls back to the suggestion it was opened with: the smart
+                # suggested description if available, otherwise the extracted description
+                if suggested is None:
+                    suggested = self.suggested_description or self.fallback_description
+                categorized_tx["description"] = suggested
+                description_source = " + smart description" if self.suggested_description else " + auto-description"
+        
+            if self.is_income:
+                income.append(categorized_tx)
+            else:
+                expenses.append(categorized_tx)
+
+            save_session(self.user_id, remaining, income, expenses)
+        
+            # Queue transaction for immediate upload to Google Sheets
             try:
-                await interaction.edit_original_response(view=self)
+                # Check if this is a cached transaction being processed
+                if '_cache_id' in tx:
+                    # This is a processed cached transaction - remove from cache
+                    cache_id = tx['_cache_id']
+                    remove_cached_transaction(self.user_id, cache_id)
+                
+                    # Remove the cache marker before uploading (nothing reads it back from the session)
+                    categorized_tx.pop('_cache_id', None)
+                    await queue_transaction_upload_async(categorized_tx, self.transaction_type, self.user_id)
+                    upload_indicator = " 🔄📤"
+                    logger.info(f"Processed cached transaction {cache_id}")
+                else:
+                    # Regular transaction
+                    await queue_transaction_upload_async(categorized_tx, self.transaction_type, self.user_id)
+                    upload_indicator = " 📤"
             except Exception as e:
-                logger.debug(f"Could not edit original message: {e}")
-            await start_transaction_prompt(interaction, self.user_id)
-        else:
-            await interaction.response.send_message(
-                content=f"🎉 All {len(income) + len(expenses)} transactions processed{upload_indicator}!", 
-                ephemeral=True
+                logger.error(f"❌ Failed to queue transaction for upload: {e}")
+                upload_indicator = ""
+
+            # Send concise confirmation message
+            processed = len(income) + len(expenses)
+        
+            # Add smart categorization indicator
+            smart_indicator = ""
+            if self.suggested_description and not description:
+                smart_indicator = " 🤖"
+        
+            await self._advance(
+                interaction,
+                (remaining, income, expenses),
+                f"✅ Categorized as {self.selected_category}{description_source}{smart_indicator}{upload_indicator} {_progress(processed, len(remaining))}",
+                f"🎉 All {processed} transactions processed{upload_indicator}!"
             )
-            # Update the original message to disable buttons immediately
-            try:
-                await interaction.edit_original_response(view=self)
-            except Exception as e:
-                logger.debug(f"Could not edit original message: {e}")
-            clear_session(self.user_id)
-            
-            # Auto-delete completion message after 5 seconds
-            asyncio.create_task(self._delete_response_after_delay(interaction, 5))
 
     async def skip_transaction(self, interaction: discord.Interaction):
         """Skip the current transaction and move to the next one"""
-        remaining, income, expenses = load_session(self.user_id)
-        if not remaining:
-            await interaction.response.send_message("❌ No transactions remaining.", ephemeral=True)
-            asyncio.create_task(self._delete_response_after_delay(interaction, 3))
-            return
-
-        # Remove the current transaction from remaining (skip it)
-        tx = remaining.pop(0)
-        save_session(self.user_id, remaining, income, expenses)
+        transaction = self.transaction
+        # Acknowledge right away (loading the session may hit disk and Discord only waits
+        # 3 seconds); the prompt message itself is then edited to show the next transaction
+        await interaction.response.defer()
+        
+        async with lock_for(self.user_id):
+            if self.handled or self.transaction is not transaction:
+                await respond(interaction, "⚠️ This transaction was already handled.", ephemeral=True, delete_after=3)
+                return
+            
+            session = await self._load_session_at(interaction, transaction)
+            if session is None:
+                return
+            remaining, income, expenses = session
 
-        # Disable all buttons and selects to prevent further interactions
-        self.switch_type_button.disabled = True
-        self.category_select.disabled = True
-        self.confirm_button.disabled = True
-        self.skip_button.disabled = True
-        self.cache_button.disabled = True
+            # Remove the current transaction from remaining (skip it)
+            remaining.popleft()
+            self.handled = True
+            save_session(self.user_id, remaining, income, expenses)
 
-        # Send confirmation message
-        progress_info = f"({len(income) + len(expenses)}/{len(remaining) + len(income) + len(expenses)} done, 1 skipped)"
-        
-        if remaining:
-            await interaction.response.send_message(
-                content=f"⏭️ Transaction skipped {progress_info}", 
-                ephemeral=True
-            )
-            # Update the original message to show completion
-            try:
-                await interaction.edit_original_response(view=self)
-            except Exception as e:
-                logger.warning(f"Failed to edit the original response: {e}")  # Message might already be updated
-            await start_transaction_prompt(interaction, self.user_id)
-        else:
-            await interaction.response.send_message(
-                content=f"🎉 All transactions processed! {len(income) + len(expenses)} categorized, 1 skipped.", 
-                ephemeral=True
+            # Send confirmation message
+            processed = len(income) + len(expenses)
+            await self._advance(
+                interaction,
+                (remaining, income, expenses),
+                f"⏭️ Transaction skipped {_progress(processed, len(remaining), ', 1 skipped')}",
+                f"🎉 All transactions processed! {processed} categorized, 1 skipped."
             )
-            # Update the original message to show completion
-            try:
-                await interaction.edit_original_response(view=self)
-            except:
-                pass  # Message might already be updated
-            clear_session(self.user_id)
-            
-            # Auto-delete completion message after 5 seconds
-            asyncio.create_task(self._delete_response_after_delay(interaction, 5))
 
     async def cache_transaction(self, interaction: discord.Interaction):
         """Cache the current transaction for later processing"""
-        remaining, income, expenses = load_session(self.user_id)
-        if not remaining:
-            await interaction.response.send_message("❌ No transactions remaining.", ephemeral=True)
-            asyncio.create_task(self._delete_response_after_delay(interaction, 3))
-            return
+        transaction = self.transaction
+        # Acknowledge right away (loading the session may hit disk and Discord only waits
+        # 3 seconds); the prompt message itself is then edited to show the next transaction
+        await interaction.response.defer()
+        
+        async with lock_for(self.user_id):
+            if self.handled or self.transaction is not transaction:
+                await respond(interaction, "⚠️ This transaction was already handled.", ephemeral=True, delete_after=3)
+                return
+            
+            session = await self._load_session_at(interaction, transaction)
+            if session is None:
+                return
+            remaining, income, expenses = session
 
-        tx = remaining.pop(0)
+            tx = remaining.popleft()
         
-        # Generate auto-description without cache icon
-        auto_description = self._extract_suggested_description(tx)
+            # Generate auto-description without cache icon
+            auto_description = self.fallback_description
         
-        try:
-            from finance_core.session_management import cache_transaction
-            from constants import ExpenseCategory, IncomeCategory
-            
-            # Cache the transaction in the session
-            cache_id = cache_transaction(self.user_id, tx, self.transaction_type, auto_description)
+            try:
+                # Cache the transaction in the session
+                cache_id = cache_transaction(self.user_id, tx, self.transaction_type, auto_description)
             
-            # Queue a dummy transaction for immediate upload to Google Sheets
-            dummy_transaction = {**tx}
-            dummy_transaction["category"] = ExpenseCategory.DUMMY_CACHED.value if self.transaction_type == "expense" else IncomeCategory.DUMMY_CACHED.value
-            dummy_transaction["description"] = auto_description  # Clean description without cache icon
-            dummy_transaction["cache_id"] = cache_id  # Add cache_id for tracking
+                # Queue a dummy transaction for immediate upload to Google Sheets
+                dummy_transaction = {**tx}
+                dummy_transaction["category"] = IncomeCategory.DUMMY_CACHED.value if self.is_income else ExpenseCategory.DUMMY_CACHED.value
+                dummy_transaction["description"] = auto_description  # Clean description without cache icon
+                dummy_transaction["cache_id"] = cache_id  # Add cache_id for tracking
             
-            from finance_core.background_upload import queue_transaction_upload
-            queue_transaction_upload(dummy_transaction, self.transaction_type, self.user_id)
+                await queue_transaction_upload_async(dummy_transaction, self.transaction_type, self.user_id)
             
-            cache_indicator = f" 📦 (ID: {cache_id})"
-        except Exception as e:
-            logger.error(f"❌ Failed to cache transaction: {e}")
-            # Put transaction back if caching failed
-            remaining.insert(0, tx)
-            save_session(self.user_id, remaining, income, expenses)
-            await interaction.response.send_message("❌ Failed to cache transaction.", ephemeral=True)
-            asyncio.create_task(self._delete_response_after_delay(interaction, 3))
-            return
-        
-        # Save updated session (with transaction removed from remaining)
-        save_session(self.user_id, remaining, income, expenses)
+                cache_indicator = f" 📦 (ID: {cache_id})"
+            except Exception as e:
+                logger.error(f"❌ Failed to cache transaction: {e}")
+                # Put transaction back if caching failed
+                remaining.appendleft(tx)
+                save_session(self.user_id, remaining, income, expenses)
+                await respond(interaction, "❌ Failed to cache transaction.", ephemeral=True, delete_after=3)
+                return
         
-        # Disable all buttons and selects to prevent further interactions
-        self.switch_type_button.disabled = True
-        self.category_select.disabled = True
-        self.confirm_button.disabled = True
-        self.skip_button.disabled = True
-        self.cache_button.disabled = True
-
-        # Send confirmation message
-        progress_info = f"({len(income) + len(expenses)}/{len(remaining) + len(income) + len(expenses)} done, 1 cached)"
+            # Save updated session (with transaction removed from remaining)
+            self.handled = True
+            save_session(self.user_id, remaining, income, expenses)
         
-        if remaining:
-            await interaction.response.send_message(
-                content=f"📦 Transaction cached for later{cache_indicator} {progress_info}", 
-                ephemeral=True
+            # Send confirmation message
+            processed = len(income) + len(expenses)
+            await self._advance(
+                interaction,
+                (remaining, income, expenses),
+                f"📦 Transaction cached for later{cache_indicator} {_progress(processed, len(remaining), ', 1 cached')}",
+                f"🎉 All transactions processed! 📦 Last one cached{cache_indicator}"
             )
-            # Update the original message to show completion
-            try:
-                await interaction.edit_original_response(view=self)
-            except Exception:
-                pass  # Message might already be updated
-            await start_transaction_prompt(interaction, self.user_id)
+
+    async def _advance(self, interaction: discord.Interaction, session: Tuple[Sequence[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]], status: str, final: str):
+        """Replace this prompt with the next transaction (status on top), or wrap up once none remain"""
+        if session[0]:
+            await start_transaction_prompt(interaction, self.user_id, view=self, session=session, status=status)
         else:
-            await interaction.response.send_message(
-                content=f"🎉 All transactions processed! 📦 Last one cached{cache_indicator}", 
-                ephemeral=True
-            )
-            # Update the original message to show completion
-            try:
-                await interaction.edit_original_response(view=self)
-            except Exception:
-                pass  # Message might already be updated
+            await self._finish_prompt(interaction, final)
             clear_session(self.user_id)
-            
+        
             # Auto-delete completion message after 5 seconds
-            asyncio.create_task(self._delete_response_after_delay(interaction, 5))
+            spawn(self._tasks, self._delete_response_after_delay(interaction, 5))
 
-    async def _delete_response_after_delay(self, interaction: discord.Interaction, delay: int):
-        await asyncio.sleep(delay)
+    async def _finish_prompt(self, interaction: discord.Interaction, content: str):
+        """Replace the prompt message with a final status and remove the buttons"""
+        self.stop()
         try:
-            await interaction.delete_original_response()
-        except:
-            pass  # Message might already be deleted
-
-async def start_transaction_prompt(interaction: discord.Interaction, user_id: int):
-    remaining, income, expenses = load_session(user_id)
-    if not remaining:
-        await interaction.followup.send("⚠️ No transactions left to process.", ephemeral=True)
-        return
-
-    tx = remaining[0]
-    embed = discord.Embed(title="🧾 Transaction to Categorize", color=discord.Color.blurple())
-    
-    # Add basic transaction info
-    embed.add_field(name="📅 Date", value=tx.get("booking_date", "Unknown"), inline=True)
-    
+            await interaction.edit_original_response(content=content, embed=None, view=None)
+        except Exception as e:
+            logger.debug(f"Could not edit original message: {e}")
+
+# Workflow help shown at the bottom of each prompt
+_WORKFLOW_TEXT = "1️⃣ Select category → 2️⃣ Click **Confirm & Add Description** → 3️⃣ Review/edit description\n\n⏭️ **Skip Transaction** if already processed manually\n📦 **Cache for Later** to save with dummy data for later processing"
+_CACHED_WORKFLOW_TEXT = (
+    "1️⃣ Select category → 2️⃣ Click **Confirm & Add Description** → 3️⃣ Review/edit description\n\n"
+    "📦 This transaction was cached earlier and has a dummy entry in your sheet.\n"
+    "✅ Processing it will **replace** the dummy entry with the proper categorization."
+)
+_PREFILLED_NOTE = "\n\n✨ *Category and description pre-filled based on transaction data*"
+
+def _transaction_fields(tx: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Build the date, amount, type, bank description and counterparty fields shared by both prompts"""
     # Format amount with proper sign
-    amount = tx.get('transaction_amount', {}).get('amount', '0')
-    currency = tx.get('transaction_amount', {}).get('currency', 'EUR')
-    embed.add_field(name="💰 Amount", value=f"{amount} {currency}", inline=True)
-    
-    # Show transaction type with emoji
-    tx_type = tx.get("credit_debit_indicator", "UNKNOWN")
-    type_emoji = "💵" if tx_type == "CRDT" else "💸"
-    type_text = "Income" if tx_type == "CRDT" else "Expense"
-    embed.add_field(name="📊 Type", value=f"{type_emoji} {type_text}", inline=True)
+    amount_info = tx.get("transaction_amount") or {}
+    amount = amount_info.get("amount", "0")
+    currency = amount_info.get("currency", "EUR")
     
     # Add remittance information (transaction description)
     remittance = tx.get("remittance_information") or ["No description"]
     # Limit to first 1000 characters to avoid embed limits
-    remittance_text = "\n".join(remittance)[:1000]
-    if len("\n".join(remittance)) > 1000:
-        remittance_text += "..."
-    embed.add_field(name="📝 Bank Description", value=remittance_text, inline=False)
-
-    # Add counterparty info if available
-    if debtor_name := tx.get("debtor", {}).get("name"):
-        embed.add_field(name="👤 From", value=debtor_name, inline=True)
-    if creditor_name := tx.get("creditor", {}).get("name"):
-        embed.add_field(name="👤 To", value=creditor_name, inline=True)
+    joined = "\n".join(remittance)
+    remittance_text = joined if len(joined) <= 1000 else joined[:1000] + "..."
     
-    # Add progress indicator
-    total_transactions = len(remaining) + len(income) + len(expenses)
-    processed = len(income) + len(expenses)
-    embed.add_field(name="📈 Progress", value=f"{processed}/{total_transactions} completed", inline=True)
-
-    # Check if auto-categorization found a match
-    suggested_category, suggested_description = apply_categorization_rules(tx)
-    if suggested_category:
-        embed.add_field(name="🤖 Smart Suggestion", value=f"**{suggested_category}**\n{suggested_description}", inline=False)
+    fields = [
+        {"name": "📅 Date", "value": tx.get("booking_date", "Unknown"), "inline": True},
+        {"name": "💰 Amount", "value": f"{amount} {currency}", "inline": True},
+        {"name": "📊 Type", "value": _TYPE_DISPLAY[_is_income(tx)], "inline": True},
+        {"name": "📝 Bank Description", "value": remittance_text, "inline": False},
+    ]
 
-    # Add workflow info
-    workflow_text = "1️⃣ Select category → 2️⃣ Click **Confirm & Add Description** → 3️⃣ Review/edit description\n\n⏭️ **Skip Transaction** if already processed manually\n📦 **Cache for Later** to save with dummy data for later processing"
+    # Add counterparty info if available
+    if debtor_name := (tx.get("debtor") or {}).get("name"):
+        fields.append({"name": "👤 From", "value": debtor_name, "inline": True})
+    if creditor_name := (tx.get("creditor") or {}).get("name"):
+        fields.append({"name": "👤 To", "value": creditor_name, "inline": True})
+    return fields
+
+def _suggestion_fields(view: "_BaseTransactionView", workflow_name: str, workflow_text: str) -> List[Dict[str, Any]]:
+    """Build the smart suggestion (if any) and workflow fields from the rules the view already applied"""
+    suggested_category, suggested_description = view._rule_suggestion
+    fields = []
     if suggested_category:
-        workflow_text += "\n\n✨ *Category and description pre-filled based on transaction data*"
-    
-    embed.add_field(
-        name="📋 Next Steps", 
-        value=workflow_text, 
-        inline=False
-    )
+        fields.append({"name": "🤖 Smart Suggestion", "value": f"**{suggested_category}**\n{suggested_description}", "inline": False})
+        workflow_text += _PREFILLED_NOTE
+    fields.append({"name": workflow_name, "value": workflow_text, "inline": False})
+    return fields
+
+async def start_transaction_prompt(
+    interaction: discord.Interaction,
+    user_id: int,
+    status: Optional[str] = None,
+    view: Optional[TransactionView] = None,
+    session: Optional[Tuple[Sequence[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]] = None
+):
+    """
+    Show the next transaction to categorize.
+    Without a status the prompt is sent as a new message; with one (after a button
+    press) the interaction's own message is edited in place, status on top.
+    An existing view is pointed at the next transaction instead of building a new one,
+    and callers that already hold the session lists pass them in to skip reloading it.
+    """
+    if session is not None:
+        remaining, income, expenses = session
+        tx = remaining[0] if remaining else None
+        pending, processed = len(remaining), len(income) + len(expenses)
+    else:
+        # Only the next transaction and the counts are needed, not copies of the lists
+        tx, pending, processed = await run_blocking(peek_session, user_id)
+    if tx is None:
+        await interaction.followup.send("⚠️ No transactions left to process.", ephemeral=True)
+        return
 
-    view = TransactionView(user_id, tx)
-    await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+    if view is None:
+        view = TransactionView(user_id, tx)
+    else:
+        view.update(tx)
 
-async def start_cached_transaction_prompt(interaction: discord.Interaction, user_id: int, cached_tx: Dict[str, Any]):
-    """Start processing a single cached transaction"""
-    
-    # Extract the original transaction from the cached data
-    tx = cached_tx["original_transaction"]
-    
-    # Add cache tracking to the transaction
-    tx["_cache_id"] = cached_tx["cache_id"]
-    
-    embed = discord.Embed(title="🧾📦 Cached Transaction to Process", color=discord.Color.orange())
-    
-    # Add basic transaction info
-    embed.add_field(name="📅 Date", value=tx.get("booking_date", "Unknown"), inline=True)
+    # Add progress indicator
+    total_transactions = processed + pending
     
-    # Format amount with proper sign
-    amount = tx.get('transaction_amount', {}).get('amount', '0')
-    currency = tx.get('transaction_amount', {}).get('currency', 'EUR')
-    embed.add_field(name="💰 Amount", value=f"{amount} {currency}", inline=True)
+    fields = _transaction_fields(tx)
+    fields.append({"name": "📈 Progress", "value": f"{processed}/{total_transactions} completed", "inline": True})
+    fields += _suggestion_fields(view, "📋 Next Steps", _WORKFLOW_TEXT)
+    embed = discord.Embed.from_dict({
+        "title": "🧾 Transaction to Categorize",
+        "color": discord.Color.blurple().value,
+        "fields": fields
+    })
+
+    if status is None:
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+    else:
+        await interaction.edit_original_response(content=status, embed=embed, view=view)
+
+async def start_cached_transaction_prompt(interaction: discord.Interaction, user_id: int, cached_tx: Dict[str, Any], status: Optional[str] = None):
+    """Start processing a single cached transaction (editing the interaction's message in place when a status is given)"""
     
-    # Show transaction type with emoji
-    tx_type = tx.get("credit_debit_indicator", "UNKNOWN")
-    type_emoji = "💵" if tx_type == "CRDT" else "💸"
-    type_text = "Income" if tx_type == "CRDT" else "Expense"
-    embed.add_field(name="📊 Type", value=f"{type_emoji} {type_text}", inline=True)
+    # Extract the original transaction from the cached data. This is the live cache
+    # record, so it is only read; the view carries the cache id itself.
+    tx = cached_tx["original_transaction"]
     
-    # Add remittance information (transaction description)
-    remittance = tx.get("remittance_information") or ["No description"]
-    # Limit to first 1000 characters to avoid embed limits
-    remittance_text = "\n".join(remittance)[:1000]
-    if len("\n".join(remittance)) > 1000:
-        remittance_text += "..."
-    embed.add_field(name="📝 Bank Description", value=remittance_text, inline=False)
-
-    # Add counterparty info if available
-    if debtor_name := tx.get("debtor", {}).get("name"):
-        embed.add_field(name="👤 From", value=debtor_name, inline=True)
-    if creditor_name := tx.get("creditor", {}).get("name"):
-        embed.add_field(name="👤 To", value=creditor_name, inline=True)
+    # Create a special view for cached transactions (doesn't need session management)
+    view = CachedTransactionView(user_id, tx, cached_tx["cache_id"])
     
+    fields = _transaction_fields(tx)
     # Add cache info
-    embed.add_field(name="📦 Cache Info", value=f"**ID:** {cached_tx['cache_id']}\n**Cached:** {cached_tx['timestamp'][:10]}", inline=True)
-
-    # Check if auto-categorization found a match
-    suggested_category, suggested_description = apply_categorization_rules(tx)
-    if suggested_category:
-        embed.add_field(name="🤖 Smart Suggestion", value=f"**{suggested_category}**\n{suggested_description}", inline=False)
+    fields.append({"name": "📦 Cache Info", "value": f"**ID:** {cached_tx['cache_id']}\n**Cached:** {cached_tx['timestamp'][:10]}", "inline": True})
+    fields += _suggestion_fields(view, "📋 Processing Cached Transaction", _CACHED_WORKFLOW_TEXT)
+    embed = discord.Embed.from_dict({
+        "title": "🧾📦 Cached Transaction to Process",
+        "color": discord.Color.orange().value,
+        "fields": fields
+    })
 
-    # Add workflow info for cached transactions
-    workflow_text = "1️⃣ Select category → 2️⃣ Click **Confirm & Add Description** → 3️⃣ Review/edit description\n\n"
-    workflow_text += "📦 This transaction was cached earlier and has a dummy entry in your sheet.\n"
-    workflow_text += "✅ Processing it will **replace** the dummy entry with the proper categorization."
-    if suggested_category:
-        workflow_text += "\n\n✨ *Category and description pre-filled based on transaction data*"
-    
-    embed.add_field(
-        name="📋 Processing Cached Transaction", 
-        value=workflow_text, 
-        inline=False
-    )
-
-    # Create a special view for cached transactions (doesn't need session management)
-    view = CachedTransactionView(user_id, tx, cached_tx["cache_id"])
-    await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+    if status is None:
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+    else:
+        await interaction.edit_original_response(content=status, embed=embed, view=view)
 
 
-class CachedTransactionView(View):
+class CachedTransactionView(_BaseTransactionView):
     """Special view for processing individual cached transactions"""
     
     def __init__(self, user_id: int, transaction: Dict[str, Any], cache_id: str):
-        super().__init__(timeout=300)  # 5 minute timeout
-        self.user_id = user_id
-        self.transaction = transaction
+        super().__init__(user_id)
         self.cache_id = cache_id
-        self.transaction_type = "income" if transaction["credit_debit_indicator"] == "CRDT" else "expense"
-        self.custom_description = None
-        
-        # Apply categorization rules to get smart defaults
-        suggested_category, suggested_description = apply_categorization_rules(transaction)
-        self.selected_category = suggested_category
-        self.suggested_description = suggested_description
-
-        self.switch_type_button = Button(label=f"Switch to {'expense' if self.transaction_type == 'income' else 'income'}", style=discord.ButtonStyle.secondary)
-        self.switch_type_button.callback = self.switch_type
-        self.add_item(self.switch_type_button)
-
-        # Limit categories to 25 (Discord's maximum for select options)
-        categories = CATEGORY_OPTIONS[self.transaction_type][:25]
-        
-        # Create category select with smart default
-        category_options = []
-        for cat in categories:
-            option = discord.SelectOption(label=cat)
-            # Pre-select the suggested category if we have one
-            if suggested_category and cat == suggested_category:
-                option.default = True
-            category_options.append(option)
-        
-        self.category_select = Select(
-            placeholder="Select a category" if not suggested_category else f"✨ Suggested: {suggested_category}",
-            options=category_options
-        )
-        self.category_select.callback = self.select_category
-        self.add_item(self.category_select)
+        self._set_transaction(transaction)
+        # Set once the replacement is queued, so a second submit can't queue it again
+        self.handled = False
 
         self.confirm_button = Button(label="Process & Replace Dummy", style=discord.ButtonStyle.success)
         self.confirm_button.callback = self.confirm_transaction
@@ -656,209 +804,120 @@ class CachedTransactionView(View):
         self.cancel_button.callback = self.cancel_processing
         self.add_item(self.cancel_button)
 
-    def _extract_suggested_description(self, transaction: Dict[str, Any]) -> str:
-        """Extract a suggested description from transaction data"""
-        description_parts = []
-        
-        # Add counterparty information (most important)
-        debtor_name = transaction.get("debtor", {}).get("name", "")
-        creditor_name = transaction.get("creditor", {}).get("name", "")
-        counterparty = debtor_name or creditor_name
-        if counterparty:
-            # Clean up common bank codes/prefixes to make it more readable
-            cleaned_counterparty = counterparty.replace("NL", "").replace("INGB", "").strip()
-            description_parts.append(cleaned_counterparty)
-        
-        # Add first line of remittance information (transaction details)
-        remittance = transaction.get("remittance_information", [])
-        if remittance and remittance[0]:
-            first_line = remittance[0].strip()
-            if first_line and first_line not in description_parts:
-                # Clean up common patterns to make it more readable
-                cleaned_remittance = first_line.replace("SEPA", "").replace("IBAN", "").strip()
-                description_parts.append(cleaned_remittance)
-        
-        # Combine and limit length for Discord placeholder
-        if description_parts:
-            suggested = " - ".join(description_parts)
-        else:
-            suggested = "Enter transaction description"
-        
-        # Limit to 90 chars to leave room for "..." if needed
-        return suggested[:90]
-
-    async def on_timeout(self):
-        # Disable all items when view times out
-        self.switch_type_button.disabled = True
-        self.category_select.disabled = True
-        self.confirm_button.disabled = True
-        self.cancel_button.disabled = True
-
-    async def switch_type(self, interaction: discord.Interaction):
-        self.transaction_type = "expense" if self.transaction_type == "income" else "income"
-        self.switch_type_button.label = f"Switch to {'expense' if self.transaction_type == 'income' else 'income'}"
-        
-        # Re-apply categorization rules for the new transaction type
-        suggested_category, suggested_description = apply_categorization_rules(self.transaction)
-        
-        # Only update suggestions if they match the new transaction type
-        if self.transaction_type == "income" and suggested_category in CATEGORY_OPTIONS["income"]:
-            self.selected_category = suggested_category
-            self.suggested_description = suggested_description
-        elif self.transaction_type == "expense" and suggested_category in CATEGORY_OPTIONS["expense"]:
-            self.selected_category = suggested_category
-            self.suggested_description = suggested_description
-        else:
-            # No smart suggestion for this type, reset
-            self.selected_category = None
-            self.suggested_description = None
-        
-        # Update category options with limit and smart defaults
-        categories = CATEGORY_OPTIONS[self.transaction_type][:25]
-        category_options = []
-        for cat in categories:
-            option = discord.SelectOption(label=cat)
-            # Pre-select the suggested category if we have one
-            if self.selected_category and cat == self.selected_category:
-                option.default = True
-            category_options.append(option)
-        
-        self.category_select.options = category_options
-        self.category_select.placeholder = "Select a category" if not self.selected_category else f"✨ Suggested: {self.selected_category}"
-        
-        await interaction.response.edit_message(view=self)
-
-    async def select_category(self, interaction: discord.Interaction):
-        self.selected_category = self.category_select.values[0]
-        await interaction.response.defer()
-
     async def confirm_transaction(self, interaction: discord.Interaction):
-        if not self.selected_category:
-            await interaction.response.send_message("⚠️ Please select a category first.", ephemeral=True)
-            # Auto-delete after 3 seconds
-            asyncio.create_task(self._delete_response_after_delay(interaction, 3))
-            return
+        async with lock_for(self.user_id):
+            if self.handled:
+                await respond(interaction, "⚠️ This cached transaction was already processed.", ephemeral=True, delete_after=3)
+                return
+            
+            if not self.selected_category:
+                # Auto-delete after 3 seconds
+                await respond(interaction, "⚠️ Please select a category first.", ephemeral=True, delete_after=3)
+                return
 
-        # Use smart suggested description if available, otherwise fall back to extracted description
-        smart_suggestion = self.suggested_description
-        if not smart_suggestion:
-            smart_suggestion = self._extract_suggested_description(self.transaction)
+            # Use smart suggested description if available, otherwise fall back to extracted description
+            smart_suggestion = self.suggested_description
+            if not smart_suggestion:
+                smart_suggestion = self.fallback_description
         
-        # Open description modal with smart suggestion
-        modal = CachedDescriptionModal(self, smart_suggestion)
-        await interaction.response.send_modal(modal)
+            # Open description modal with smart suggestion
+            modal = CachedDescriptionModal(self, smart_suggestion)
+            await interaction.response.send_modal(modal)
 
     async def complete_cached_transaction(self, interaction: discord.Interaction, description: str):
         """Complete the cached transaction processing"""
-        try:
-            # Create the properly categorized transaction
-            categorized_tx = {**self.transaction, "category": self.selected_category}
+        # Acknowledge first; the prompt message is edited in place once the next one is ready
+        await interaction.response.defer()
+        
+        async with lock_for(self.user_id):
+            if self.handled:
+                await respond(interaction, "⚠️ This cached transaction was already processed.", ephemeral=True, delete_after=3)
+                return
             
-            # Track if transaction type was manually switched from original
-            original_type = "income" if self.transaction["credit_debit_indicator"] == "CRDT" else "expense"
-            if self.transaction_type != original_type:
-                categorized_tx["manually_switched"] = True
+            try:
+                # Create the properly categorized transaction
+                categorized_tx = {**self.transaction, "category": self.selected_category}
             
-            # Always add a description - either custom or auto-generated
-            if description:
-                categorized_tx["description"] = description
-                description_source = " + custom description"
-            else:
-                # Use smart suggested description if available, otherwise fall back to extracted description
-                if self.suggested_description:
-                    categorized_tx["description"] = self.suggested_description
-                    description_source = " + smart description"
-                else:
-                    auto_desc = self._extract_suggested_description(self.transaction)
-                    categorized_tx["description"] = auto_desc
-                    description_source = " + auto-description"
+                # Track if transaction type was manually switched from original
+                if self.is_income != _is_income(self.transaction):
+                    categorized_tx["manually_switched"] = True
             
-            # Keep the cache_id for replacement logic
-            categorized_tx["cache_id"] = self.cache_id
+                # Always add a description - either custom or auto-generated
+                if description:
+                    categorized_tx["description"] = description
+                    description_source = " + custom description"
+                else:
+                    # Use smart suggested description if available, otherwise fall back to extracted description
+                    if self.suggested_description:
+                        categorized_tx["description"] = self.suggested_description
+                        description_source = " + smart description"
+                    else:
+                        auto_desc = self.fallback_description
+                        categorized_tx["description"] = auto_desc
+                        description_source = " + auto-description"
             
-            # Get the reserved row before removing from cache
-            from finance_core.session_management import get_cached_transactions
-            cached_transactions = get_cached_transactions(self.user_id)
-            reserved_row = None
+                # Keep the cache_id for replacement logic
+                categorized_tx["cache_id"] = self.cache_id
             
-            for cached_tx in cached_transactions:
-                if cached_tx["cache_id"] == self.cache_id:
-                    reserved_row = cached_tx.get("sheet_row")
-                    break
+                # Get the dummy's row before removing from cache
+                cached_tx = get_cached_transaction(self.user_id, self.cache_id)
+                if cached_tx is None:
+                    await respond(interaction, "❌ Error: This cached transaction was already processed or cleared.", ephemeral=True)
+                    return
             
-            if not reserved_row:
-                await interaction.response.send_message("❌ Error: Could not find reserved row for cached transaction. Please try again.", ephemeral=True)
-                return
+                # Store the row in the transaction for the background worker. A dummy that is still
+                # waiting in the upload queue has no row yet; the worker resolves it once it's written.
+                if cached_tx.get("sheet_row"):
+                    categorized_tx["_reserved_row"] = cached_tx["sheet_row"]
             
-            # Store the reserved row in the transaction for the background worker
-            categorized_tx["_reserved_row"] = reserved_row
+                # Queue transaction for replacement in Google Sheets (will replace dummy entry)
+                await queue_cached_replacement_async(self.cache_id, categorized_tx, self.transaction_type, self.user_id)
+                self.handled = True
             
-            # Queue transaction for replacement in Google Sheets (will replace dummy entry)
-            from finance_core.background_upload import queue_cached_replacement
-            queue_cached_replacement(self.cache_id, categorized_tx, self.transaction_type, self.user_id)
+                # IMPORTANT: Remove the cached transaction from session IMMEDIATELY to prevent duplicates
+                # The background upload will also try to remove it, but we need to remove it here
+                # to ensure it's not visible in the UI anymore
+                remove_cached_transaction(self.user_id, self.cache_id)
             
-            # IMPORTANT: Remove the cached transaction from session IMMEDIATELY to prevent duplicates
-            # The background upload will also try to remove it, but we need to remove it here
-            # to ensure it's not visible in the UI anymore
-            from finance_core.session_management import remove_cached_transaction
-            remove_cached_transaction(self.user_id, self.cache_id)
+                # Check if there are more cached transactions (after removing current one)
+                next_cached, remaining_count = peek_cached_transactions(self.user_id)
             
-            # Disable all buttons and selects to prevent further interactions
-            self.switch_type_button.disabled = True
-            self.category_select.disabled = True
-            self.confirm_button.disabled = True
-            self.cancel_button.disabled = True
-
-            # Check if there are more cached transactions (after removing current one)
-            from finance_core.session_management import get_cached_transactions
-            remaining_cached = get_cached_transactions(self.user_id)
+                # Add smart categorization indicator
+                smart_indicator = ""
+                if self.suggested_description and not description:
+                    smart_indicator = " 🤖"
             
-            # Add smart categorization indicator
-            smart_indicator = ""
-            if self.suggested_description and not description:
-                smart_indicator = " 🤖"
-            
-            if remaining_cached:
-                await interaction.response.send_message(
-                    content=f"✅ Cached transaction processed as {self.selected_category}{description_source}{smart_indicator} 📤\n🔄 {len(remaining_cached)} more cached transactions remaining.", 
-                    ephemeral=True
-                )
-                
-                # Update the original message to show completion
-                try:
-                    await interaction.edit_original_response(view=self)
-                except Exception as e:
-                    logger.warning(f"Failed to edit the original response: {e}")
-                
-                # Continue with next cached transaction
-                next_cached = remaining_cached[0]
-                await start_cached_transaction_prompt(interaction, self.user_id, next_cached)
-            else:
-                await interaction.response.send_message(
-                    content=f"🎉 All cached transactions processed! Last one: {self.selected_category}{description_source}{smart_indicator} 📤", 
-                    ephemeral=True
-                )
-                
-                # Update the original message to show completion
-                try:
-                    await interaction.edit_original_response(view=self)
-                except Exception:
-                    pass  # Message might already be updated
+                if next_cached is not None:
+                    # Continue with next cached transaction in the same message
+                    await start_cached_transaction_prompt(
+                        interaction,
+                        self.user_id,
+                        next_cached,
+                        status=f"✅ Cached transaction processed as {self.selected_category}{description_source}{smart_indicator} 📤\n🔄 {remaining_count} more cached transactions remaining."
+                    )
+                else:
+                    # Replace the prompt with the final status
+                    self.stop()
+                    try:
+                        await interaction.edit_original_response(
+                            content=f"🎉 All cached transactions processed! Last one: {self.selected_category}{description_source}{smart_indicator} 📤",
+                            embed=None,
+                            view=None
+                        )
+                    except Exception:
+                        pass  # Message might already be updated
                 
-                # Auto-delete completion message after 5 seconds
-                asyncio.create_task(self._delete_response_after_delay(interaction, 5))
+                    # Auto-delete completion message after 5 seconds
+                    spawn(self._tasks, self._delete_response_after_delay(interaction, 5))
             
-        except Exception as e:
-            logger.error(f"❌ Failed to process cached transaction: {e}")
-            await interaction.response.send_message(f"❌ Error processing cached transaction: {str(e)}", ephemeral=True)
+            except Exception as e:
+                logger.error(f"❌ Failed to process cached transaction: {e}")
+                await respond(interaction, f"❌ Error processing cached transaction: {str(e)}", ephemeral=True)
 
     async def cancel_processing(self, interaction: discord.Interaction):
         """Cancel processing of cached transactions"""
         # Disable all buttons
-        self.switch_type_button.disabled = True
-        self.category_select.disabled = True
-        self.confirm_button.disabled = True
-        self.cancel_button.disabled = True
+        self._disable_all()
         
         await interaction.response.send_message("❌ Cached transaction processing cancelled.", ephemeral=True)
         
@@ -869,14 +928,7 @@ class CachedTransactionView(View):
             pass  # Message might already be updated
         
         # Auto-delete after 3 seconds
-        asyncio.create_task(self._delete_response_after_delay(interaction, 3))
-
-    async def _delete_response_after_delay(self, interaction: discord.Interaction, delay: int):
-        await asyncio.sleep(delay)
-        try:
-            await interaction.delete_original_response()
-        except Exception:
-            pass  # Message might already be deleted
+        spawn(self._tasks, self._delete_response_after_delay(interaction, 3))
 
 
 class CachedDescriptionModal(Modal):
@@ -884,17 +936,7 @@ class CachedDescriptionModal(Modal):
         super().__init__(title="Process Cached Transaction")
         self.cached_view = cached_view
         
-        # Truncate placeholder to Discord's 100 character limit
-        placeholder_text = suggested_description[:95] + "..." if len(suggested_description) > 95 else suggested_description
-        
-        self.description_input = TextInput(
-            label="Transaction Description",
-            placeholder=placeholder_text,
-            max_length=500,
-            required=False,  # Allow empty to use auto-description
-            style=discord.TextStyle.paragraph,
-            default=suggested_description[:500]  # Pre-fill with suggestion
-        )
+        self.description_input = _description_input(suggested_description)
         self.add_item(self.description_input)
     
     async def on_submit(self, interaction: discord.Interaction):